@@ -1,14 +1,586 @@
-import bisect
+import copy
+import hashlib
 import json
+import multiprocessing
 import numpy as np
+import os
+import struct
 import time
 from pathlib import Path
 from os import cpu_count
+from typing import NamedTuple
 from concurrent.futures import ProcessPoolExecutor, as_completed
 
 DEBUG = False
 
 
+class OrbitalParameters(NamedTuple):
+    """An immutable snapshot of the variables needed to calculate scroll events. Small enough
+    to be sent to worker processes with every task instead of a whole `Ephemeris` instance.
+    """
+
+    shadowPeriod: int
+    shadowRefTime: int
+    shadowRefOffset: float
+    periods: tuple[int, ...]
+    radii: tuple[float, ...]
+    refTimes: tuple[int, ...]
+    refPositions: tuple[float, ...]
+    glowThresh: float
+    darkThresh: float
+    increment: int
+    scanBlockSize: int
+    refinePrecision: int
+    analyticSolver: bool
+    discordTimestamps: bool
+
+
+# Orb names in the order of the alignment states, bit i of an event mask corresponds to ORB_NAMES[i]
+ORB_NAMES = (
+    "Shadow",
+    "White",
+    "Black",
+    "Green",
+    "Red",
+    "Purple",
+    "Yellow",
+    "Cyan",
+    "Blue",
+)
+# the value of each orb's bit in an alignment or event mask
+ORB_BITS = 1 << np.arange(len(ORB_NAMES), dtype=np.int64)
+# the orb names included in every possible event mask
+MASK_NAMES = tuple(
+    tuple(name for i, name in enumerate(ORB_NAMES) if mask >> i & 1)
+    for mask in range(1 << len(ORB_NAMES))
+)
+
+
+def getOrbMask(orbs: list[str]) -> int:
+    """Converts orb names into an event mask.
+
+    Parameters
+    ------------
+    orbs: `list[str]`
+        The names of the orbs to include in the mask.
+
+    Returns
+    ---------
+    `int`
+        A mask with the bit of each of the orbs set.
+    """
+    return sum(1 << ORB_NAMES.index(orb) for orb in set(orbs))
+
+
+# identifies the binary scroll event cache format, the version is bumped when the layout changes
+CACHE_MAGIC = b"EPHC"
+CACHE_VERSION = 1
+# magic, format version, orbital variables hash, covered time range, and number of events,
+# padded to 64 bytes so the event records that follow are aligned
+CACHE_HEADER = struct.Struct("<4sH2x32sqqQ")
+# fixed width event records, padded to 16 bytes
+CACHE_RECORD = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("newGlows", "<u2"),
+        ("newDarks", "<u2"),
+        ("returnedToNormal", "<u2"),
+        ("padding", "<u2"),
+    ]
+)
+
+
+class CacheHeader(NamedTuple):
+    """The header of a binary scroll event cache file."""
+
+    version: int
+    variablesHash: bytes
+    startTime: int
+    stopTime: int
+    eventCount: int
+
+
+class ScrollEventStore:
+    """A chronologically ordered store of scroll events kept as NumPy columns. Each event is an
+    int64 timestamp and uint16 bitmasks of the orbs that begin to glow, go dark, and return to
+    normal. The event `dict` used when rendering is only built when an event is requested.
+    An index of every orb involved in each event is kept alongside the columns so orb filters
+    are a single bitwise and.
+    """
+
+    def __init__(
+        self,
+        timestamps=(),
+        newGlows=(),
+        newDarks=(),
+        returnedToNormal=(),
+        discordTimestamps: bool = False,
+        involvedOrbs=None,
+    ) -> None:
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.newGlows = np.asarray(newGlows, dtype=np.uint16)
+        self.newDarks = np.asarray(newDarks, dtype=np.uint16)
+        self.returnedToNormal = np.asarray(returnedToNormal, dtype=np.uint16)
+        self.discordTimestamps = discordTimestamps
+        # slices of a store pass in the matching slice of its index instead of rebuilding it
+        if involvedOrbs is None:
+            involvedOrbs = self.newGlows | self.newDarks | self.returnedToNormal
+        self.involvedOrbs = np.asarray(involvedOrbs, dtype=np.uint16)
+
+    @classmethod
+    def fromRecords(
+        cls, records: list[tuple[int, int, int, int]], discordTimestamps: bool = False
+    ) -> "ScrollEventStore":
+        """Creates a store from a chronologically ordered `list` of event records.
+
+        Parameters
+        ------------
+        records: `list[tuple[int, int, int, int]]`
+            Tuples of the event timestamp in ms and the newGlows, newDarks, and returnedToNormal masks.
+        discordTimestamps: `bool` *(optional)*
+            When set to true the event dicts will include a discord timestamp. Defaults to False.
+
+        Returns
+        ---------
+        `ScrollEventStore`
+            A store containing the events.
+        """
+        if len(records) == 0:
+            return cls(discordTimestamps=discordTimestamps)
+        return cls(*zip(*records), discordTimestamps=discordTimestamps)
+
+    @classmethod
+    def concatenate(
+        cls, stores: list["ScrollEventStore"], discordTimestamps: bool = False
+    ) -> "ScrollEventStore":
+        """Joins chronologically ordered stores that cover consecutive time ranges into one store.
+
+        Parameters
+        ------------
+        stores: `list[ScrollEventStore]`
+            The stores to join, in chronological order.
+        discordTimestamps: `bool` *(optional)*
+            When set to true the event dicts will include a discord timestamp. Defaults to False.
+
+        Returns
+        ---------
+        `ScrollEventStore`
+            A store containing the events of every passed in store.
+        """
+        if len(stores) == 0:
+            return cls(discordTimestamps=discordTimestamps)
+        return cls(
+            np.concatenate([store.timestamps for store in stores]),
+            np.concatenate([store.newGlows for store in stores]),
+            np.concatenate([store.newDarks for store in stores]),
+            np.concatenate([store.returnedToNormal for store in stores]),
+            discordTimestamps,
+            np.concatenate([store.involvedOrbs for store in stores]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ScrollEventStore(
+                self.timestamps[index],
+                self.newGlows[index],
+                self.newDarks[index],
+                self.returnedToNormal[index],
+                self.discordTimestamps,
+                self.involvedOrbs[index],
+            )
+        return self.getEvent(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.getEvent(i)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ScrollEventStore):
+            return NotImplemented
+        return (
+            np.array_equal(self.timestamps, other.timestamps)
+            and np.array_equal(self.newGlows, other.newGlows)
+            and np.array_equal(self.newDarks, other.newDarks)
+            and np.array_equal(self.returnedToNormal, other.returnedToNormal)
+        )
+
+    def getEvent(self, index: int) -> tuple[int, dict[str, any]]:
+        """Builds the `tuple` for a single event in the same form the events are rendered from.
+
+        Parameters
+        ------------
+        index: `int`
+            The index of the event in the store.
+
+        Returns
+        ---------
+        `tuple[int, dict[str, any]]`
+            A `tuple` who's first element is the epoch time stamp in ms for the event
+            and the second element is a `dict` containing the event information.
+        """
+        timestamp = int(self.timestamps[index])
+        event = {
+            "newGlows": list(MASK_NAMES[self.newGlows[index]]),
+            "newDarks": list(MASK_NAMES[self.newDarks[index]]),
+            "returnedToNormal": list(MASK_NAMES[self.returnedToNormal[index]]),
+        }
+        if self.discordTimestamps:
+            event["discordTS"] = f"<t:{timestamp // 1000}:D> <t:{timestamp // 1000}:T>"
+        return (timestamp, event)
+
+    def getRangeIndices(self, startTime: int, endTime: int) -> tuple[int, int]:
+        """Finds the slice of the store that contains the events between startTime and endTime
+        (inclusive) in O(2log(n)) time.
+
+        Parameters
+        ------------
+        startTime: `int`
+            The epoch time in ms of the earliest event to include.
+        endTime: `int`
+            The epoch time in ms of the latest event to include.
+
+        Returns
+        ---------
+        `tuple[int, int]`
+            The start and stop indices of the events in the time range.
+        """
+        startIndex = int(np.searchsorted(self.timestamps, startTime, side="left"))
+        stopIndex = int(np.searchsorted(self.timestamps, endTime, side="right"))
+        return startIndex, stopIndex
+
+    def getOrbFilterMask(
+        self, orbs: list[str], startIndex: int = 0, stopIndex: int = None
+    ) -> np.ndarray[bool]:
+        """Finds which events between startIndex and stopIndex affect any of the passed in orbs.
+
+        Parameters
+        ------------
+        orbs: `list[str]`
+            The names of the orbs to filter for.
+        startIndex: `int` *(optional)*
+            The index of the first event to check. Defaults to 0.
+        stopIndex: `int` *(optional)*
+            The index after the last event to check. Defaults to the end of the store.
+
+        Returns
+        ---------
+        `np.ndarray[bool]`
+            True for each event in which any of the orbs begins to glow, goes dark, or returns to normal.
+        """
+        orbMask = getOrbMask(orbs)
+        return self.involvedOrbs[startIndex:stopIndex] & orbMask != 0
+
+    def toList(self) -> list[tuple[int, dict[str, any]]]:
+        """Builds the `tuple` for every event in the store.
+
+        Returns
+        ---------
+        `list[tuple[int, dict[str, any]]]`
+            A chronologically ordered `list` of `tuples` that contain a timestamp and a dictionary containing
+            information about the changed phases and a discord timestamp for the event.
+        """
+        return list(self)
+
+    def save(
+        self, fileLoc: Path, variablesHash: bytes, startTime: int, stopTime: int
+    ) -> None:
+        """Writes the store to a binary cache file made up of a `CACHE_HEADER` followed by one
+        `CACHE_RECORD` per event. The file is written to a temporary file first and then renamed
+        over fileLoc, so readers never see a partially written cache.
+
+        Parameters
+        ------------
+        fileLoc: `Path`
+            The path to the cache file.
+        variablesHash: `bytes`
+            The 32 byte hash of the orbital variables the events were calculated with.
+        startTime: `int`
+            The epoch time in ms that the events were calculated from.
+        stopTime: `int`
+            The epoch time in ms that the events were calculated up to.
+        """
+        records = np.zeros(len(self), dtype=CACHE_RECORD)
+        records["timestamp"] = self.timestamps
+        records["newGlows"] = self.newGlows
+        records["newDarks"] = self.newDarks
+        records["returnedToNormal"] = self.returnedToNormal
+        header = CACHE_HEADER.pack(
+            CACHE_MAGIC,
+            CACHE_VERSION,
+            variablesHash,
+            int(startTime),
+            int(stopTime),
+            len(self),
+        )
+        tempFile = fileLoc.with_name(fileLoc.name + ".tmp")
+        with open(tempFile, "wb") as outfile:
+            outfile.write(header)
+            outfile.write(records.tobytes())
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(tempFile, fileLoc)
+
+    @classmethod
+    def load(
+        cls, fileLoc: Path, discordTimestamps: bool = False
+    ) -> tuple[CacheHeader, "ScrollEventStore"] | None:
+        """Reads a binary cache file written by `save`. The event records are memory-mapped
+        rather than parsed, so the columns of the returned store are read from disk as needed.
+
+        Parameters
+        ------------
+        fileLoc: `Path`
+            The path to the cache file.
+        discordTimestamps: `bool` *(optional)*
+            When set to true the event dicts will include a discord timestamp. Defaults to False.
+
+        Returns
+        ---------
+        `tuple[CacheHeader, ScrollEventStore] | None`
+            The file's header and a store backed by its records, or None if the file doesn't
+            exist or isn't a valid cache file.
+        """
+        if not fileLoc.exists():
+            return None
+        with open(fileLoc, "rb") as infile:
+            headerBytes = infile.read(CACHE_HEADER.size)
+        if len(headerBytes) < CACHE_HEADER.size:
+            print(f"{fileLoc} is too short to be a cache file")
+            return None
+        magic, *fields = CACHE_HEADER.unpack(headerBytes)
+        header = CacheHeader(*fields)
+        if magic != CACHE_MAGIC or header.version != CACHE_VERSION:
+            print(f"{fileLoc} is not a version {CACHE_VERSION} cache file")
+            return None
+        expectedSize = CACHE_HEADER.size + header.eventCount * CACHE_RECORD.itemsize
+        if fileLoc.stat().st_size != expectedSize:
+            print(f"{fileLoc} is truncated or corrupt")
+            return None
+        if header.eventCount == 0:
+            # empty files can't be memory-mapped
+            records = np.zeros(0, dtype=CACHE_RECORD)
+        else:
+            records = np.memmap(
+                fileLoc,
+                dtype=CACHE_RECORD,
+                mode="r",
+                offset=CACHE_HEADER.size,
+                shape=(header.eventCount,),
+            )
+        return header, cls(
+            records["timestamp"],
+            records["newGlows"],
+            records["newDarks"],
+            records["returnedToNormal"],
+            discordTimestamps,
+        )
+
+
+# moon phase names in the order they occur, a phase's code in a LunarEventStore is its index
+PHASE_NAMES = (
+    "new",
+    "waxing_crescent",
+    "first_quarter",
+    "waxing_gibbous",
+    "full",
+    "waning_gibbous",
+    "third_quarter",
+    "waning_crescent",
+)
+
+
+class LunarEventStore:
+    """A chronologically ordered store of moon phase changes kept as parallel NumPy arrays of
+    int64 timestamps and uint8 phase codes. A sorted array of the positions of each phase is
+    built alongside them, so the next occurrence of any set of phases is found with a binary
+    search instead of a scan.
+    """
+
+    def __init__(self, timestamps=(), phases=()) -> None:
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.phases = np.asarray(phases, dtype=np.uint8)
+        self.phaseIndices = tuple(
+            np.flatnonzero(self.phases == code) for code in range(len(PHASE_NAMES))
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return LunarEventStore(self.timestamps[index], self.phases[index])
+        return self.getEvent(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.getEvent(i)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, LunarEventStore):
+            return NotImplemented
+        return np.array_equal(self.timestamps, other.timestamps) and np.array_equal(
+            self.phases, other.phases
+        )
+
+    def getEvent(self, index: int) -> tuple[int, dict[str, str]]:
+        """Builds the `tuple` for a single phase change in the same form the events are rendered from.
+
+        Parameters
+        ------------
+        index: `int`
+            The index of the event in the store.
+
+        Returns
+        ---------
+        `tuple[int, dict[str, str]]`
+            A `tuple` who's first element is the epoch time stamp in ms for the event and the
+            second element is a `dict` containing the name of the new phase.
+        """
+        return (int(self.timestamps[index]), {"phase": PHASE_NAMES[self.phases[index]]})
+
+    def getStartIndex(self, startTime: int) -> int:
+        """Finds the index of the first event after startTime in O(log(n)) time.
+
+        Parameters
+        ------------
+        startTime: `int`
+            An epoch time in ms.
+
+        Returns
+        ---------
+        `int`
+            The index of the first event that happens after startTime, equal to the length of
+            the store if there isn't one.
+        """
+        return int(np.searchsorted(self.timestamps, startTime, side="right"))
+
+    def getPhaseEventIndices(
+        self, phases: list[str], startIndex: int = 0
+    ) -> np.ndarray[int]:
+        """Finds the indices of the events from startIndex onward that change the moon to any
+        of the passed in phases.
+
+        Parameters
+        ------------
+        phases: `list[str]`
+            The names of the phases to filter for. Names that aren't phases are ignored.
+        startIndex: `int` *(optional)*
+            The index of the earliest event to include. Defaults to 0.
+
+        Returns
+        ---------
+        `np.ndarray[int]`
+            The chronologically ordered indices of the matching events.
+        """
+        indices = [
+            self.phaseIndices[code][
+                np.searchsorted(self.phaseIndices[code], startIndex, side="left") :
+            ]
+            for code, phase in enumerate(PHASE_NAMES)
+            if phase in phases
+        ]
+        if len(indices) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(indices))
+
+    def toList(self) -> list[tuple[int, dict[str, str]]]:
+        """Builds the `tuple` for every event in the store.
+
+        Returns
+        ---------
+        `list[tuple[int, dict[str, str]]]`
+            A chronologically ordered `list` of `tuples` that contain a timestamp and a dictionary
+            containing the name of the new phase.
+        """
+        return list(self)
+
+
+class DayBucketIndex:
+    """Maps time offsets from a moving reference time, such as the start of each day that can be
+    selected in a menu, to the positions of the events in a `ScrollEventStore` that they fall
+    between. A boundary's position only changes once the reference time moves it past an event,
+    so the positions are searched for again only when that happens rather than on every lookup.
+    """
+
+    def __init__(
+        self, store: ScrollEventStore, generation: int = 0, offsets=()
+    ) -> None:
+        self.store = store
+        self.generation = generation
+        self.offsets = np.unique(np.asarray(offsets, dtype=np.int64))
+        self.referenceTime = None
+        self.validUntil = None
+        self.startIndices = np.zeros(0, dtype=np.int64)
+        self.stopIndices = np.zeros(0, dtype=np.int64)
+
+    def update(self, referenceTime: int) -> None:
+        """Moves the boundaries to referenceTime, searching for their positions again only if one
+        of them has passed an event.
+
+        Parameters
+        ------------
+        referenceTime: `int`
+            The epoch time in ms that the offsets are relative to.
+        """
+        if (
+            self.referenceTime is not None
+            and self.referenceTime <= referenceTime <= self.validUntil
+        ):
+            return
+        timestamps = self.store.timestamps
+        boundaryTimes = referenceTime + self.offsets
+        self.startIndices = np.searchsorted(timestamps, boundaryTimes, side="left")
+        self.stopIndices = np.searchsorted(timestamps, boundaryTimes, side="right")
+        # the first index at or after a boundary changes once the boundary moves past that event,
+        # the first index after a boundary changes as soon as the boundary reaches that event.
+        # indices past the last event never change
+        noEvent = np.iinfo(np.int64).max // 2
+        nextEventTimes = np.append(timestamps, noEvent)
+        self.validUntil = int(
+            min(
+                np.min(
+                    nextEventTimes[self.startIndices] - self.offsets, initial=noEvent
+                ),
+                np.min(
+                    nextEventTimes[self.stopIndices] - self.offsets - 1, initial=noEvent
+                ),
+            )
+        )
+        self.referenceTime = referenceTime
+
+    def getRangeIndices(
+        self, referenceTime: int, startOffset: int, endOffset: int
+    ) -> tuple[int, int]:
+        """Finds the slice of the store that contains the events between referenceTime + startOffset
+        and referenceTime + endOffset (inclusive).
+
+        Parameters
+        ------------
+        referenceTime: `int`
+            The epoch time in ms that the offsets are relative to.
+        startOffset: `int`
+            The offset in ms of the earliest event to include.
+        endOffset: `int`
+            The offset in ms of the latest event to include.
+
+        Returns
+        ---------
+        `tuple[int, int]`
+            The start and stop indices of the events in the time range.
+        """
+        if not np.isin([startOffset, endOffset], self.offsets).all():
+            # new offsets are added to the index the first time they're used
+            self.offsets = np.union1d(self.offsets, [startOffset, endOffset])
+            self.referenceTime = None
+        self.update(referenceTime)
+        startPos = np.searchsorted(self.offsets, startOffset)
+        endPos = np.searchsorted(self.offsets, endOffset)
+        return int(self.startIndices[startPos]), int(self.stopIndices[endPos])
+
+
 class Ephemeris:
     def __init__(
         self,
@@ -18,9 +590,13 @@ class Ephemeris:
         discordTimestamps: bool = False,
         multiProcess: bool = True,
         numCores: int | None = None,
+        analyticSolver: bool = True,
+        warmStart: bool = False,
     ) -> None:
         self.discordTimestamps = discordTimestamps
         self.multiProcess = multiProcess
+        # solve for alignment windows per orb pair instead of sampling every increment
+        self.analyticSolver = analyticSolver
         self.numCores = numCores
         if multiProcess:
             cpuCount = cpu_count() or 1
@@ -36,32 +612,133 @@ class Ephemeris:
         self.glowThresh = 0.5
         self.darkThresh = 1
         self.increment = 60 * 1000
+        # number of coarse samples evaluated per vectorized pass while scanning for events
+        self.scanBlockSize = 1440
+        # the precision in ms that alignment change times are refined to
+        self.refinePrecision = 1
+        # length in ms of the chunks a scroll event range is split into, independent of the
+        # number of cores so the events found don't depend on how the work is divided
+        self.chunkSize = 24 * 60 * 60 * 1000
         self.oneAberothDay = 8640000
         self.noonRefTime = 1725903360554  # Night starts 42 minutes after
         self.variablesFile = Path("ephemeris/Ephemeris/variables.json")
-        self.cacheFile = Path("ephemeris/Ephemeris/cache.json")
+        self.cacheFile = Path("ephemeris/Ephemeris/cache.bin")
         self.newRefTimeFile = Path("ephemeris/UpdateWebServer/newRefTimes.json")
-        self.v: dict[str, dict] = self.getVariables(self.variablesFile)
-        self.periods = self.getPeriods()
-        self.radii = self.getRadii()
-        self.refTimes = self.getRefTimes()
-        self.refOffsets = self.getRefOffsets()
-        self.setRefPositions()
-        self.refPositions = self.getRefPositions()
+        self.v: dict[str, dict] = {}
+        self.setVariables(self.getVariables(self.variablesFile))
+        self.updateVariables()
+
+        self.setPairIndices()
+        # worker processes for multi-process cache builds, started on first use and kept
+        # for the lifetime of the instance
+        self.processPool = None
+        # created when day ranges of the scroll event cache are first requested
+        self.dayBuckets = None
 
         # Boolean that indicates if orb is aligned with another orb or the shadow orb
         # Ordered as ['shadow', 'white', 'black', 'green', 'red', 'purple', 'yellow', 'cyan', 'blue']
         self.currentAlignmentStates = np.full(9, False)
         self.lastAlignmentStates = np.full(9, False)
-        self.scrollEventsCache = []
-        self.scrollEventsCache = self.multiProcessCreateScrollEventRange(start, end)
+        # incremented whenever the caches are replaced or the orbs are recalibrated so anything
+        # derived from the caches can tell that it's out of date
+        self.cacheGeneration = 0
+        self.scrollEventsCache = ScrollEventStore(discordTimestamps=discordTimestamps)
+        if warmStart and self.loadScrollCache(start):
+            # only calculate the events after the end of the saved cache
+            self.extendScrollCache(end)
+        else:
+            self.scrollEventsCache = self.multiProcessCreateScrollEventRange(start, end)
+            # the time range in ms that the scroll event cache covers
+            self.scrollCacheStart = start
+            self.scrollCacheStop = end
+            self.saveCache(self.cacheFile)
         self.moonCyclesCache = self.createLunarCalendar(start, numMoonCycles)
-        self.saveCache(self.cacheFile)
+
+    @classmethod
+    def fromOrbitalParameters(cls, params: OrbitalParameters) -> "Ephemeris":
+        """Creates a lightweight instance that can calculate scroll events from an `OrbitalParameters`
+        record without reading the variable files or building any caches. Used by worker processes.
+
+        Parameters
+        ------------
+        params: `OrbitalParameters`
+            The orbital variables and calculation settings to use.
+
+        Returns
+        ---------
+        `Ephemeris`
+            An instance with the passed in variables and empty caches.
+        """
+        instance = cls.__new__(cls)
+        instance.orbitalParameters = params
+        instance.discordTimestamps = params.discordTimestamps
+        instance.multiProcess = False
+        instance.numCores = 1
+        instance.analyticSolver = params.analyticSolver
+        instance.glowThresh = params.glowThresh
+        instance.darkThresh = params.darkThresh
+        instance.increment = params.increment
+        instance.scanBlockSize = params.scanBlockSize
+        instance.refinePrecision = params.refinePrecision
+        instance.v = {
+            "shadow": {
+                "period": params.shadowPeriod,
+                "refTime": params.shadowRefTime,
+                "refOffset": params.shadowRefOffset,
+            }
+        }
+        instance.periods = np.array(params.periods)
+        instance.radii = np.array(params.radii)
+        instance.refTimes = np.array(params.refTimes)
+        instance.refPositions = np.array(params.refPositions)
+        instance.setPairIndices()
+        instance.processPool = None
+        instance.dayBuckets = None
+        instance.cacheGeneration = 0
+        instance.scrollEventsCache = ScrollEventStore(
+            discordTimestamps=params.discordTimestamps
+        )
+        instance.moonCyclesCache = LunarEventStore()
+        return instance
+
+    def getOrbitalParameters(self) -> OrbitalParameters:
+        """Packages the current orb variables and calculation settings into an `OrbitalParameters` record.
+
+        Returns
+        ---------
+        `OrbitalParameters`
+            The variables needed to calculate scroll events.
+        """
+        return OrbitalParameters(
+            shadowPeriod=self.v["shadow"]["period"],
+            shadowRefTime=self.v["shadow"]["refTime"],
+            shadowRefOffset=self.v["shadow"]["refOffset"],
+            periods=tuple(self.periods.tolist()),
+            radii=tuple(self.radii.tolist()),
+            refTimes=tuple(self.refTimes.tolist()),
+            refPositions=tuple(self.refPositions.tolist()),
+            glowThresh=self.glowThresh,
+            darkThresh=self.darkThresh,
+            increment=self.increment,
+            scanBlockSize=self.scanBlockSize,
+            refinePrecision=self.refinePrecision,
+            analyticSolver=self.analyticSolver,
+            discordTimestamps=self.discordTimestamps,
+        )
+
+    def setPairIndices(self) -> None:
+        """Stores the row and column indices of each unique orb pair, in the same order as the
+        flattened output of calcAlignmentDifs, along with which pairs each orb is a member of.
+        """
+        self.pairIndices = np.triu_indices(9, k=1)
+        self.pairMembership = np.zeros((36, 9), dtype=np.int8)
+        self.pairMembership[np.arange(36), self.pairIndices[0]] = 1
+        self.pairMembership[np.arange(36), self.pairIndices[1]] = 1
 
     def createScrollEventRange(
         self, startTime: int, stopTime: int, saveToCache: bool = False
-    ) -> list[tuple[int, dict[str, any]]]:
-        """Creates a chronologically ordered `list` of `tuples` that each
+    ) -> ScrollEventStore:
+        """Creates a chronologically ordered `ScrollEventStore` of events that each
         contain information on a unique change in scroll/alignment states
 
         Parameters
@@ -76,48 +753,42 @@ class Ephemeris:
 
         Returns
         ---------
-        `list[tuple[int, dict[str, any]]]`
-            A chronologically ordered `list` of `tuples` that contain a timestamp and a dictionary containing
-            information about the changed phases and a discord timestamp for the event.
+        `ScrollEventStore`
+            The chronologically ordered events, each containing information about the changed phases.
         """
         if startTime == stopTime or startTime > stopTime:
             print("stopTime must be greater than startTime")
-            return []
-
-        currentTime = startTime
-        tempCache = []
-        # create event for the starting alignments
-        self.lastAlignmentStates = np.full(9, False)
-        self.currentAlignmentStates = self.setAlignmentStates(currentTime)
-        # tempCache.append(self.createAlignmentEvent(currentTime))
+            return ScrollEventStore(discordTimestamps=self.discordTimestamps)
+        # convert float to int
+        startTime = int(startTime)
+        stopTime = int(stopTime)
 
-        # colon is IMPORTANT, creates shallow copy of list instead of copy by ref
-        self.lastAlignmentStates = self.currentAlignmentStates[:]
-        # iterate through time range and find events
-        while currentTime < stopTime:
-            self.currentAlignmentStates = self.setAlignmentStates(currentTime)
-            if self.checkForAlignmentChange():
-                currentTime -= self.increment
-                # if an alignment is found go back a step and step through with small step size to find more accurate start
-                while currentTime <= (currentTime + self.increment):
-                    self.currentAlignmentStates = self.setAlignmentStates(currentTime)
-                    if self.checkForAlignmentChange():
-                        tempCache.append(self.createAlignmentEvent(currentTime))
-                        # colon is IMPORTANT, creates shallow copy of list instead of copy by ref
-                        self.lastAlignmentStates = self.currentAlignmentStates[:]
-                        break
-                    currentTime += 1000
-            currentTime += self.increment
+        chunkCaches = []
+        for (
+            chunkStart,
+            chunkEnd,
+            chunkNum,
+            startAlignmentMask,
+        ) in self.getScrollChunks(startTime, stopTime):
+            chunkCaches.append(
+                self.processScrollTimeRange(
+                    chunkStart, chunkEnd, chunkNum, startAlignmentMask
+                )
+            )
+        tempCache = ScrollEventStore.concatenate(chunkCaches, self.discordTimestamps)
         if saveToCache:
             self.scrollEventsCache = tempCache
+            self.cacheGeneration += 1
+            self.scrollCacheStart = startTime
+            self.scrollCacheStop = stopTime
             self.saveCache(self.cacheFile)
         return tempCache
 
     def multiProcessCreateScrollEventRange(
         self, startTime: int, stopTime: int, saveToCache: bool = False
-    ) -> list[tuple[int, dict[str, any]]]:
+    ) -> ScrollEventStore:
         """Splits the time range into chunks and utilizes multi-processing in order to make a chronologically
-        ordered `list` of `tuples` that each contain information on a unique change in scroll/alignment states
+        ordered `ScrollEventStore` of events that each contain information on a unique change in scroll/alignment states
 
         Parameters
         ------------
@@ -131,9 +802,8 @@ class Ephemeris:
 
         Returns
         ---------
-        `list[tuple[int, dict[str, any]]]`
-            A chronologically ordered `list` of `tuples` that contain a timestamp and a dictionary containing
-            information about the changed phases and a discord timestamp for the event.
+        `ScrollEventStore`
+            The chronologically ordered events, each containing information about the changed phases.
         """
         if not self.multiProcess or self.numCores == 1:
             # use normal process when only one core is available
@@ -141,30 +811,12 @@ class Ephemeris:
         if startTime == stopTime or startTime > stopTime:
             # if the time range is not valid return
             print("stopTime must be greater than startTime")
-            return []
+            return ScrollEventStore(discordTimestamps=self.discordTimestamps)
         # convert float to int
         startTime = int(startTime)
         stopTime = int(stopTime)
 
-        # divide the time range into ~equal chunks for each core
-        chunkSize = (stopTime - startTime) // self.numCores
-        chunks = []
-        chunkNum = 0
-        for chunkStart in range(startTime, stopTime, chunkSize):
-            # package chunk information to be passed as an argument
-            chunks.append(
-                (
-                    chunkStart,
-                    (
-                        chunkEnd
-                        if (chunkEnd := chunkStart + chunkSize) <= stopTime
-                        else stopTime
-                    ),
-                    chunkNum,
-                )
-            )
-            chunkNum += 1
-
+        chunks = self.getScrollChunks(startTime, stopTime)
         retries = 0
         max_retries = 3
         while retries < max_retries:
@@ -188,57 +840,129 @@ class Ephemeris:
 
         if saveToCache:
             self.scrollEventsCache = tempCache
+            self.cacheGeneration += 1
+            self.scrollCacheStart = startTime
+            self.scrollCacheStop = stopTime
             self.saveCache(self.cacheFile)
         return tempCache
 
+    def getScrollChunks(
+        self, startTime: int, stopTime: int
+    ) -> list[tuple[int, int, int, int | None]]:
+        """Splits a time range into chunks of `self.chunkSize` ms and finds the alignment states
+        leading into each chunk. Carrying these states across the boundaries means a change that
+        lands exactly on a chunk boundary is recorded once, by the chunk that it starts.
+
+        Parameters
+        ------------
+        startTime: `int`
+            The epoch time in ms that the first chunk will start from.
+        stopTime: `int`
+            The epoch time in ms that the last chunk will stop at.
+
+        Returns
+        ---------
+        `list[tuple[int, int, int, int | None]]`
+            The start time, stop time, and index of each chunk along with the alignment mask
+            during the last ms before it. The first chunk has no leading mask.
+        """
+        chunkStarts = list(range(startTime, stopTime, self.chunkSize))
+        chunkEnds = chunkStarts[1:] + [stopTime]
+        boundaryMasks = self.getAlignmentMasksBatch(
+            np.array(chunkStarts[1:], dtype=np.int64) - self.refinePrecision
+        ).tolist()
+        return [
+            (
+                chunkStart,
+                chunkEnd,
+                chunkNum,
+                boundaryMasks[chunkNum - 1] if chunkNum else None,
+            )
+            for chunkNum, (chunkStart, chunkEnd) in enumerate(
+                zip(chunkStarts, chunkEnds)
+            )
+        ]
+
     def createProcessPool(
-        self, chunks: tuple[int, int, int]
-    ) -> list[tuple[int, dict[str, any]]]:
-        """Creates a process pool and assigns the time chunks evenly to each process. Each process process makes
-        its own chronologically ordered `list` of `tuples` that each contain information on a unique change in scroll/alignment states.
+        self, chunks: list[tuple[int, int, int, int | None]]
+    ) -> ScrollEventStore:
+        """Assigns the time chunks evenly to the processes in the worker pool. Each process makes
+        its own chronologically ordered `ScrollEventStore` of events that each contain information on a unique change in scroll/alignment states.
         before they're recombined into a bigger cache that spans the whole time range.
 
         Parameters
         ------------
-        chunks: `tuple[int, int, int]`
-            A tuple containing the start and stop time of each chunk as an epoch timestamp in ms as well as
-            an integer that indicates where in the final cache the results should be inserted.
+        chunks: `list[tuple[int, int, int, int | None]]`
+            A tuple containing the start and stop time of each chunk as an epoch timestamp in ms,
+            an integer that indicates where in the final cache the results should be inserted, and
+            the alignment mask leading into the chunk.
 
         Returns
         ---------
-        `list[tuple[int, dict[str, any]]]`
-            A chronologically ordered `list` of `tuples` that contain a timestamp and a dictionary containing
-            information about the changed phases and a discord timestamp for the event.
+        `ScrollEventStore`
+            The chronologically ordered events, each containing information about the changed phases.
         """
-        with ProcessPoolExecutor(max_workers=self.numCores) as executor:
-            futures = {
-                executor.submit(
-                    self.processScrollTimeRange, chunkStart, chunkEnd, chunkNum
-                ): chunkNum
-                for chunkStart, chunkEnd, chunkNum in chunks
-            }
-            # Note: this section sorts data similar to a priority queue but allows inserting the
-            # whole chunk at once rather than the elements individually
-            tempCache = [None] * len(chunks)
-            for future in as_completed(futures):
-                chunkNum = futures[future]
-                try:
-                    chunkCache = future.result()
-                    tempCache[chunkNum] = chunkCache
-                except Exception as e:
-                    print(f"Exception in chunk {chunkNum}: {e}")
-                    # re-raise to propagate the exception
-                    raise
-            # reverse traverse
-            for i in range(len(chunks) - 1, -1, -1):
-                # unpack the lists of events stored in each index in tempCache
-                tempCache[i : i + 1] = tempCache[i]
-        return tempCache
+        executor = self.getProcessPool()
+        # only the orbital variables are sent with each task rather than the whole instance
+        params = self.getOrbitalParameters()
+        futures = {
+            executor.submit(
+                processScrollTimeRangeWorker,
+                params,
+                chunkStart,
+                chunkEnd,
+                chunkNum,
+                startAlignmentMask,
+            ): chunkNum
+            for chunkStart, chunkEnd, chunkNum, startAlignmentMask in chunks
+        }
+        # Note: each chunk's events are stored at the chunk's index so the chunks can be joined
+        # in chronological order regardless of the order they finish in
+        tempCache = [None] * len(chunks)
+        for future in as_completed(futures):
+            chunkNum = futures[future]
+            try:
+                chunkCache = future.result()
+                tempCache[chunkNum] = chunkCache
+            except Exception as e:
+                print(f"Exception in chunk {chunkNum}: {e}")
+                # replace the pool on the next attempt in case a worker died
+                self.shutdownProcessPool()
+                # re-raise to propagate the exception
+                raise
+        return ScrollEventStore.concatenate(tempCache, self.discordTimestamps)
+
+    def getProcessPool(self) -> ProcessPoolExecutor:
+        """Gets the worker pool used for multi-process cache builds, starting it if it isn't running.
+        Where available, workers are forked from a server process that has already imported NumPy
+        so new workers start quickly.
+
+        Returns
+        ---------
+        `ProcessPoolExecutor`
+            The long-lived worker pool owned by this instance.
+        """
+        if self.processPool is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(["numpy", __name__])
+            else:
+                context = multiprocessing.get_context()
+            self.processPool = ProcessPoolExecutor(
+                max_workers=self.numCores, mp_context=context
+            )
+        return self.processPool
+
+    def shutdownProcessPool(self) -> None:
+        """Stops the worker processes used for multi-process cache builds, if any are running."""
+        if self.processPool is not None:
+            self.processPool.shutdown(wait=False, cancel_futures=True)
+            self.processPool = None
 
     def processScrollTimeRange(
-        self, startTime, stopTime, chunkNum=None
-    ) -> list[tuple[int, dict[str, any]]]:
-        """Creates a chronologically ordered `list` of `tuples` that each contain information on a unique change in scroll/alignment states.
+        self, startTime, stopTime, chunkNum=None, startAlignmentMask=None
+    ) -> ScrollEventStore:
+        """Creates a chronologically ordered `ScrollEventStore` of events that each contain information on a unique change in scroll/alignment states.
         Multi-processing friendly
 
         Parameters
@@ -249,74 +973,390 @@ class Ephemeris:
             An epoch timestamp in ms that represents the time at which calculations will stop at.
         chunkNum: `int`
             An integer that indicates where in the final cache the results should be inserted.
+        startAlignmentMask: `int` *(optional)*
+            The alignment mask leading into startTime when continuing on from a previously
+            calculated range. If it differs from the mask at startTime, the change is recorded
+            as an event at startTime. Defaults to None.
 
         Returns
         ---------
-        `list[tuple[int, dict[str, any]]]`
-            A chronologically ordered `list` of `tuples` that contain a timestamp and a dictionary containing
-            information about the changed phases and a discord timestamp for the event.
+        `ScrollEventStore`
+            The chronologically ordered events, each containing information about the changed phases.
         """
         try:
-            currentTime = startTime
             tempCache = []
-            # Set starting state
-            lastAlignmentStates = np.full(9, False)
-            currentAlignmentStates = self.setAlignmentStates(currentTime)
-
-            # colon is IMPORTANT, creates shallow copy of list instead of copy by ref
-            lastAlignmentStates = currentAlignmentStates[:]
-            # iterate through time range and find events
-            while currentTime < stopTime:
-                currentAlignmentStates = self.setAlignmentStates(currentTime)
-                if self.checkForAlignmentChange(
-                    lastAlignmentStates, currentAlignmentStates
-                ):
-                    currentTime -= self.increment
-                    # if an alignment is found go back a step and step through with small step size to find more accurate start
-                    while currentTime <= (currentTime + self.increment):
-                        currentAlignmentStates = self.setAlignmentStates(currentTime)
-                        if self.checkForAlignmentChange(
-                            lastAlignmentStates, currentAlignmentStates
-                        ):
-                            tempCache.append(
-                                self.createAlignmentEvent(
-                                    currentTime,
-                                    lastAlignmentStates,
-                                    currentAlignmentStates,
-                                )
-                            )
-                            # colon is IMPORTANT, creates shallow copy of list instead of copy by ref
-                            lastAlignmentStates = currentAlignmentStates[:]
-                            break
-                        currentTime += 1000
-                currentTime += self.increment
+            if startAlignmentMask is not None:
+                currentAlignmentMask = self.getAlignmentMask(startTime)
+                if currentAlignmentMask != startAlignmentMask:
+                    tempCache.append(
+                        self.createAlignmentEvent(
+                            startTime, startAlignmentMask, currentAlignmentMask
+                        )
+                    )
+            if self.analyticSolver:
+                tempCache.extend(self.solveScrollTimeRange(startTime, stopTime))
+            else:
+                tempCache.extend(self.scanScrollTimeRange(startTime, stopTime))
         except Exception as e:
             print(f"Exception in worker process for chunk {chunkNum}: {e}")
             raise  # re-raise to propagate the exception
+        return ScrollEventStore.fromRecords(tempCache, self.discordTimestamps)
+
+    def scanScrollTimeRange(
+        self, startTime, stopTime
+    ) -> list[tuple[int, int, int, int]]:
+        """Creates a chronologically ordered `list` of event records that each contain information on a unique
+        change in scroll/alignment states by sampling the alignment states every `self.increment` ms.
+
+        Parameters
+        ------------
+        startTime: `int`
+            An epoch timestamp in ms that represents the time at which calculations will start at.
+        stopTime: `int`
+            An epoch timestamp in ms that represents the time at which calculations will stop at.
+
+        Returns
+        ---------
+        `list[tuple[int, int, int, int]]`
+            A chronologically ordered `list` of event records that contain a timestamp and the masks
+            of the orbs that begin to glow, go dark, and return to normal.
+        """
+        currentTime = startTime
+        tempCache = []
+        # Set starting state
+        lastAlignmentMask = self.getAlignmentMask(currentTime)
+        sampleOffsets = np.arange(self.scanBlockSize) * self.increment
+        # iterate through time range one block of coarse samples at a time and find events
+        while currentTime < stopTime:
+            sampleTimes = currentTime + sampleOffsets
+            sampleTimes = sampleTimes[sampleTimes < stopTime]
+            lastSampleTime = stopTime - self.refinePrecision
+            if sampleTimes[-1] < lastSampleTime < sampleTimes[-1] + self.increment:
+                # also sample the last ms of the range so a change between the final coarse
+                # sample and stopTime isn't lost when the range continues into another chunk
+                sampleTimes = np.append(sampleTimes, lastSampleTime)
+            blockMasks = self.getAlignmentMasksBatch(sampleTimes)
+            changed = np.flatnonzero(blockMasks != lastAlignmentMask)
+            if len(changed) == 0:
+                currentTime = sampleTimes[-1].item() + self.increment
+                continue
+            # if an alignment is found, the change is bracketed by the previous coarse sample
+            # and the sample that flagged it, refine the start time within that bracket
+            changeIndex = int(changed[0])
+            currentTime, currentAlignmentMask = self.refineAlignmentChange(
+                (
+                    sampleTimes[changeIndex - 1].item()
+                    if changeIndex
+                    else currentTime - self.increment
+                ),
+                sampleTimes[changeIndex].item(),
+                lastAlignmentMask,
+            )
+            tempCache.append(
+                self.createAlignmentEvent(
+                    currentTime,
+                    lastAlignmentMask,
+                    currentAlignmentMask,
+                )
+            )
+            lastAlignmentMask = currentAlignmentMask
+            currentTime += self.increment
         return tempCache
 
+    def solveScrollTimeRange(
+        self, startTime, stopTime
+    ) -> list[tuple[int, int, int, int]]:
+        """Creates a chronologically ordered `list` of event records that each contain information on a unique
+        change in scroll/alignment states by solving for the alignment windows of each orb pair directly.
+
+        Each pair's separation can change no faster than its maximum relative angular rate (see
+        `getMaxOrbRates`), so every pair steps forward by the time it would take to reach its
+        alignment threshold at that rate. Far from alignment the steps span hours, so the number
+        of evaluations scales with the number of alignment windows rather than the length of the range.
+        Each threshold crossing found this way is bisected to `self.refinePrecision`, giving the same
+        output as `scanScrollTimeRange`.
+
+        Parameters
+        ------------
+        startTime: `int`
+            An epoch timestamp in ms that represents the time at which calculations will start at.
+        stopTime: `int`
+            An epoch timestamp in ms that represents the time at which calculations will stop at.
+
+        Returns
+        ---------
+        `list[tuple[int, int, int, int]]`
+            A chronologically ordered `list` of event records that contain a timestamp and the masks
+            of the orbs that begin to glow, go dark, and return to normal.
+        """
+        orbRates = self.getMaxOrbRates()
+        pairRates = orbRates[self.pairIndices[0]] + orbRates[self.pairIndices[1]]
+        thresholds = np.where(
+            self.pairIndices[0] == 0, self.darkThresh, self.glowThresh
+        )
+        pairs = np.arange(36)
+        pairTimes = np.full(36, startTime)
+        difs = self.calcAlignmentDifsBatch(self.posRelCandleBatch(pairTimes))[
+            pairs, pairs
+        ]
+        pairAligned = difs < thresholds
+        lows, highs, crossedPairs = [], [], []
+        # step each pair towards its next threshold crossing until it passes the stop time
+        while len(pairs) > 0:
+            steps = np.floor(abs(difs - thresholds[pairs]) / pairRates[pairs])
+            nextTimes = pairTimes + np.maximum(steps, self.increment).astype(np.int64)
+            difs = self.calcAlignmentDifsBatch(self.posRelCandleBatch(nextTimes))[
+                np.arange(len(pairs)), pairs
+            ]
+            nextAligned = difs < thresholds[pairs]
+            crossed = nextAligned != pairAligned
+            lows.append(pairTimes[crossed])
+            highs.append(nextTimes[crossed])
+            crossedPairs.append(pairs[crossed])
+
+            active = nextTimes < stopTime
+            pairs = pairs[active]
+            pairTimes = nextTimes[active]
+            pairAligned = nextAligned[active]
+            difs = difs[active]
+
+        crossingTimes = np.unique(
+            self.bisectPairCrossings(
+                np.concatenate(lows),
+                np.concatenate(highs),
+                np.concatenate(crossedPairs),
+            )
+        )
+        crossingMasks = self.getAlignmentMasksBatch(crossingTimes)
+
+        tempCache = []
+        lastAlignmentMask = self.getAlignmentMask(startTime)
+        for crossingTime, currentAlignmentMask in zip(
+            crossingTimes.tolist(), crossingMasks.tolist()
+        ):
+            if crossingTime >= stopTime:
+                break
+            if currentAlignmentMask == lastAlignmentMask:
+                continue
+            tempCache.append(
+                self.createAlignmentEvent(
+                    crossingTime,
+                    lastAlignmentMask,
+                    currentAlignmentMask,
+                )
+            )
+            lastAlignmentMask = currentAlignmentMask
+        return tempCache
+
+    def processScrollTimeRangeScalar(
+        self, startTime, stopTime
+    ) -> list[tuple[int, int, int, int]]:
+        """Reference implementation of `processScrollTimeRange` that evaluates a single timestamp
+        per step instead of vectorized blocks. Slow, but useful for validating the batched scan.
+
+        Parameters
+        ------------
+        startTime: `int`
+            An epoch timestamp in ms that represents the time at which calculations will start at.
+        stopTime: `int`
+            An epoch timestamp in ms that represents the time at which calculations will stop at.
+
+        Returns
+        ---------
+        `list[tuple[int, int, int, int]]`
+            A chronologically ordered `list` of event records that contain a timestamp and the masks
+            of the orbs that begin to glow, go dark, and return to normal.
+        """
+        currentTime = startTime
+        tempCache = []
+        # Set starting state
+        lastAlignmentStates = self.setAlignmentStates(currentTime)
+        # iterate through time range and find events
+        while currentTime < stopTime:
+            currentAlignmentStates = self.setAlignmentStates(currentTime)
+            if self.checkForAlignmentChange(
+                lastAlignmentStates, currentAlignmentStates
+            ):
+                fineStopTime = currentTime
+                currentTime -= self.increment
+                # if an alignment is found go back a step and step through with small step size to find more accurate start
+                while currentTime <= fineStopTime:
+                    currentAlignmentStates = self.setAlignmentStates(currentTime)
+                    if self.checkForAlignmentChange(
+                        lastAlignmentStates, currentAlignmentStates
+                    ):
+                        tempCache.append(
+                            self.createAlignmentEvent(
+                                currentTime,
+                                int(lastAlignmentStates @ ORB_BITS),
+                                int(currentAlignmentStates @ ORB_BITS),
+                            )
+                        )
+                        lastAlignmentStates = currentAlignmentStates
+                        break
+                    currentTime += 1000
+            currentTime += self.increment
+        return tempCache
+
+    def refineAlignmentChange(
+        self, lowTime, highTime, lastAlignmentMask
+    ) -> tuple[int, int]:
+        """Finds the time at which the alignment states first change within a bracket by
+        bisecting the separation of each orb pair whose alignment differs between the ends of
+        the bracket. All pairs are bisected together, one vectorized evaluation per step.
+
+        Parameters
+        ------------
+        lowTime: `int`
+            An epoch timestamp in ms at which the alignment mask is still `lastAlignmentMask`.
+        highTime: `int`
+            An epoch timestamp in ms at which the alignment mask has changed.
+        lastAlignmentMask: `int`
+            The alignment mask before the change.
+
+        Returns
+        ---------
+        `tuple[int, int]`
+            The epoch timestamp in ms of the change, accurate to within `self.refinePrecision`,
+            and the alignment mask at that time.
+        """
+        bracketAligned = self.getAlignedPairsBatch(np.array([lowTime, highTime]))
+        pairs = np.flatnonzero(bracketAligned[0] != bracketAligned[1])
+        highs = self.bisectPairCrossings(
+            np.full(len(pairs), lowTime), np.full(len(pairs), highTime), pairs
+        )
+        # a pair crossing does not always change an orb's state (i.e. the orb is still
+        # aligned with another orb), so check the crossings in chronological order
+        crossingTimes = np.unique(highs)
+        crossingMasks = self.getAlignmentMasksBatch(crossingTimes)
+        for crossingTime, mask in zip(crossingTimes.tolist(), crossingMasks.tolist()):
+            if mask != lastAlignmentMask:
+                return crossingTime, mask
+        return highTime, self.getAlignmentMask(highTime)
+
+    def bisectPairCrossings(
+        self, lows: np.ndarray, highs: np.ndarray, pairs: np.ndarray[int]
+    ) -> np.ndarray:
+        """Bisects the alignment threshold crossing of many orb pairs at once, one vectorized
+        evaluation per step.
+
+        Parameters
+        ------------
+        lows: `np.ndarray`
+            Epoch timestamps in ms before each pair's crossing.
+        highs: `np.ndarray`
+            Epoch timestamps in ms after each pair's crossing.
+        pairs: `np.ndarray[int]`
+            The index, ordered by `self.pairIndices`, of the orb pair each bracket belongs to.
+
+        Returns
+        ---------
+        `np.ndarray`
+            The earliest time within `self.refinePrecision` ms after each pair's crossing at which
+            the pair's alignment matches its alignment at the end of the bracket.
+        """
+        rows = np.arange(len(pairs))
+        highAligned = self.getAlignedPairsBatch(highs)[rows, pairs]
+        while np.any(highs - lows > self.refinePrecision):
+            mids = lows + (highs - lows) // 2
+            crossed = self.getAlignedPairsBatch(mids)[rows, pairs] == highAligned
+            highs = np.where(crossed, mids, highs)
+            lows = np.where(crossed, lows, mids)
+        return highs
+
     def getScrollEventsInRange(
-        self, startTime: int, endTime: int
-    ) -> list[tuple[int, dict[str, any]]]:
+        self, startTime: int, endTime: int, orbs: list[str] = None
+    ) -> list[dict[str, any]]:
         """Subsections self.scrollEventsCache in O(2log(n)) time to only include all
         predicted events between the start and stop time. Does not change order of events.
 
         Parameters
         ------------
-        startTime: `int`
-            The epoch time in ms that alignment calculations will start from.
-        stopTime: `int`
-            The epoch time in ms that alignment calculations will stop at.
+        startTime: `int`
+            The epoch time in ms that alignment calculations will start from.
+        stopTime: `int`
+            The epoch time in ms that alignment calculations will stop at.
+        orbs: `list[str]` *(optional)*
+            When passed, only the events that affect at least one of the orbs are included.
+            Defaults to None.
+
+        Returns
+        ---------
+        `list[dict[str, any]]`
+            A chronologically ordered `list` of `dicts` that contain the predicted events' information.
+        """
+        # binary search O(log(n)), total O(2log(n))
+        startIndex, stopIndex = self.scrollEventsCache.getRangeIndices(
+            startTime, endTime
+        )
+        return [
+            event
+            for _, event in self.getScrollEventsInIndexRange(
+                startIndex, stopIndex, orbs
+            )
+        ]
+
+    def getScrollEventsInIndexRange(
+        self, startIndex: int, stopIndex: int, orbs: list[str] = None
+    ) -> list[tuple[int, dict[str, any]]]:
+        """Subsections self.scrollEventsCache to only include the events between startIndex and
+        stopIndex. Does not change order of events.
+
+        Parameters
+        ------------
+        startIndex: `int`
+            The index of the first event to include.
+        stopIndex: `int`
+            The index after the last event to include.
+        orbs: `list[str]` *(optional)*
+            When passed, only the events that affect at least one of the orbs are included.
+            Defaults to None.
+
+        Returns
+        ---------
+        `list[tuple[int, dict[str, any]]]`
+            A chronologically ordered `list` of `tuples` that contain the epoch timestamp in ms and
+            a `dict` of the predicted events' information.
+        """
+        eventIndices = range(startIndex, stopIndex)
+        if orbs:
+            # one bitwise and per event over the slice of the orb index
+            eventIndices = startIndex + np.flatnonzero(
+                self.scrollEventsCache.getOrbFilterMask(orbs, startIndex, stopIndex)
+            )
+        return [self.scrollEventsCache.getEvent(i) for i in eventIndices]
+
+    def getDayRangeIndices(
+        self, referenceTime: int, startOffset: int, endOffset: int
+    ) -> tuple[int, int]:
+        """Finds the slice of self.scrollEventsCache between referenceTime + startOffset and
+        referenceTime + endOffset (inclusive) using the day bucket index, which is rebuilt
+        whenever the cache is replaced.
+
+        Parameters
+        ------------
+        referenceTime: `int`
+            The epoch time in ms that the offsets are relative to, usually the current time.
+        startOffset: `int`
+            The offset in ms of the earliest event to include.
+        endOffset: `int`
+            The offset in ms of the latest event to include.
 
         Returns
         ---------
-        `list[tuple[int, dict[str, any]]]`
-            A chronologically ordered `list` of `tuples` that contains the predicted events' information.
+        `tuple[int, int]`
+            The start and stop indices of the events in the time range.
         """
-        # bisect O(log(n)), total O(2log(n))
-        startIndex = bisect.bisect_left(self.scrollEventsCache, (startTime,))
-        stopIndex = bisect.bisect_right(self.scrollEventsCache, (endTime,))
-        return [events for _, events in self.scrollEventsCache[startIndex:stopIndex]]
+        if (
+            self.dayBuckets is None
+            or self.dayBuckets.generation != self.cacheGeneration
+        ):
+            # keep the offsets that have already been requested
+            offsets = () if self.dayBuckets is None else self.dayBuckets.offsets
+            self.dayBuckets = DayBucketIndex(
+                self.scrollEventsCache, self.cacheGeneration, offsets
+            )
+        return self.dayBuckets.getRangeIndices(referenceTime, startOffset, endOffset)
 
     def checkForAlignmentChange(
         self, lastAlignmentStates=[], currentAlignmentStates=[]
@@ -337,94 +1377,53 @@ class Ephemeris:
         return not np.array_equal(currentAlignmentStates, lastAlignmentStates)
 
     def createAlignmentEvent(
-        self, timestamp: int, lastAlignmentStates=[], currentAlignmentStates=[]
-    ) -> tuple[int, dict[str, any]]:
-        """Creates a `tuple` containing the epoch timestamp in ms at which the alignment
-        changes and a `dict` containing information about the event.
+        self, timestamp: int, lastAlignmentMask: int, currentAlignmentMask: int
+    ) -> tuple[int, int, int, int]:
+        """Creates an event record containing the epoch timestamp in ms at which the alignment
+        changes and masks of the orbs that begin to glow, go dark, and return to normal.
 
         Parameters
         ---------
         timestamp: `int`
             The epoch time in ms that alignment change happens
+        lastAlignmentMask: `int`
+            The alignment mask before the change, with bit i set when ORB_NAMES[i] is aligned.
+        currentAlignmentMask: `int`
+            The alignment mask after the change.
 
         Returns
         ---------
-        `tuple[int, dict[str, any]]`
-            A `tuple` who's first element is the epoch time stamp in ms for the event
-            and the second element is a `dict` containing the event information.
+        `tuple[int, int, int, int]`
+            A `tuple` who's first element is the epoch time stamp in ms for the event and the
+            others are the newGlows, newDarks, and returnedToNormal masks, with bit i set for ORB_NAMES[i].
 
         """
-        names = [
-            "Shadow",
-            "White",
-            "Black",
-            "Green",
-            "Red",
-            "Purple",
-            "Yellow",
-            "Cyan",
-            "Blue",
-        ]
-        darkList = []
-        glowList = []
-        returnedToNormal = []
-        aligned = []
-        stillAligned = []
-        if len(lastAlignmentStates) < 1:
-            lastAlignmentStates = self.lastAlignmentStates
-        if len(currentAlignmentStates) < 1:
-            currentAlignmentStates = self.currentAlignmentStates
-        for i, v in enumerate(currentAlignmentStates):
-            if v != lastAlignmentStates[i]:
-                # if changed to being aligned
-                if v == True:
-                    aligned.append(names[i])
-                # if changed to being unaligned
-                else:
-                    returnedToNormal.append(names[i])
-            # if still aligned
-            elif v == True:
-                stillAligned.append(names[i])
+        shadowBit = 1
+        changed = lastAlignmentMask ^ currentAlignmentMask
+        # orbs that changed to being aligned
+        aligned = changed & currentAlignmentMask
+        # orbs that changed to being unaligned
+        returnedToNormal = changed & lastAlignmentMask
+        # orbs that are still aligned
+        stillAligned = lastAlignmentMask & currentAlignmentMask
+        darkMask = glowMask = 0
 
         # if anything is aligns with the shadow orb or aligns while something else is already aligned with the shadow orb
-        if len(aligned) > 0 and (
-            aligned[0] == names[0]
-            or (len(stillAligned) > 0 and stillAligned[0] == names[0])
-        ):
-            # add all the newly aligned orbs to the new dark list
-            darkList.extend(aligned)
-            # if there are orbs previously aligned
-            if len(stillAligned) > 0 and not lastAlignmentStates[0]:
-                # add the previously aligned orbs to the dark list if there is a new dark
-                darkList.extend(stillAligned)
+        if aligned and (aligned | stillAligned) & shadowBit:
+            # add all the newly aligned orbs to the new dark mask
+            darkMask = aligned
+            if not lastAlignmentMask & shadowBit:
+                # add the previously aligned orbs to the dark mask if there is a new dark
+                darkMask |= stillAligned
         # if alignments with the shadow orb end
-        elif len(returnedToNormal) > 0 and returnedToNormal[0] == names[0]:
-            if len(aligned) > 0:
-                # add newly aligned orbs to glow list
-                glowList.extend(aligned)
-            # if there are orbs that are still aligned (were previously glowing)
-            if len(stillAligned) > 0:
-                # add the still aligned orbs to the glow list
-                glowList.extend(stillAligned)
+        elif returnedToNormal & shadowBit:
+            # newly aligned orbs and orbs that are still aligned (were previously glowing) glow
+            glowMask = aligned | stillAligned
         else:
             # if not a new dark or returning to normal, newly aligned orbs should be glowing
-            glowList.extend(aligned)
-
-        event = (
-            timestamp,
-            {
-                "newGlows": glowList,
-                "newDarks": darkList,
-                "returnedToNormal": returnedToNormal,
-            },
-        )
-
-        if self.discordTimestamps:
-            event[1][
-                "discordTS"
-            ] = f"<t:{int(np.floor(timestamp/1000))}:D> <t:{int(np.floor(timestamp/1000))}:T>"
+            glowMask = aligned
 
-        return event
+        return (timestamp, glowMask, darkMask, returnedToNormal)
 
     # UPDATE DOCK STRING, RETURNS NOW
     def setAlignmentStates(self, time: int) -> None:
@@ -456,6 +1455,93 @@ class Ephemeris:
                 alignmentStates[i] = alignmentStates[i + j + 1] = True
         return alignmentStates
 
+    def getMaxOrbRates(self) -> np.ndarray[float]:
+        """Gets an upper bound on how fast each orb's position relative to the candle can change.
+        The shadow and white orbs move at a constant rate, while the rate of the other orbs is
+        bounded by their and the candle's orbital speed divided by their closest distance to the candle.
+
+        Returns
+        ---------
+        `np.ndarray[float]`
+            The maximum angular rate in degrees per ms of each orb relative to the candle, ordered
+            the same as `self.currentAlignmentStates`.
+        """
+        candleRate = 360 / self.periods[0]
+        orbRates = (self.radii[1:8] * 360 / self.periods[1:8] + candleRate) / abs(
+            self.radii[1:8] - self.radii[0]
+        )
+        return np.concatenate(
+            ([360 / self.v["shadow"]["period"], candleRate], orbRates)
+        )
+
+    def getAlignmentStatesBatch(self, times: np.ndarray) -> np.ndarray[bool]:
+        """Vectorized version of `setAlignmentStates` that determines the alignment state of
+        every orb at each of the passed in times in a single pass.
+
+        Parameters
+        ---------
+            times: `np.ndarray`
+                A 1-D array of epoch timestamps in ms at which orb positions are retrieved.
+        Returns
+        ---------
+        `np.ndarray[bool]`
+            An (N x 9) array where each row holds the alignment states of the orbs at the
+            corresponding time, ordered the same as `self.currentAlignmentStates`.
+        """
+        alignedPairs = self.getAlignedPairsBatch(times)
+        # an orb is aligned if any pair it is a member of is aligned
+        return (alignedPairs.astype(np.int8) @ self.pairMembership) > 0
+
+    def getAlignmentMask(self, time: int) -> int:
+        """Gets the alignment states at a single time as a 9-bit integer.
+
+        Parameters
+        ---------
+            time: `int`
+                The epoch timestamp in ms at which orb positions are retrieved.
+
+        Returns
+        ---------
+            `int`
+                The alignment mask, with bit i set when ORB_NAMES[i] is aligned with any other orb.
+        """
+        return self.getAlignmentMasksBatch(np.array([time]))[0].item()
+
+    def getAlignmentMasksBatch(self, times: np.ndarray) -> np.ndarray[int]:
+        """Vectorized version of `getAlignmentMask` that evaluates many timestamps at once.
+
+        Parameters
+        ---------
+            times: `np.ndarray`
+                The epoch timestamps in ms at which orb positions are retrieved.
+
+        Returns
+        ---------
+            `np.ndarray[int]`
+                The alignment mask at each timestamp.
+        """
+        return self.getAlignmentStatesBatch(times) @ ORB_BITS
+
+    def getAlignedPairsBatch(self, times: np.ndarray) -> np.ndarray[bool]:
+        """Determines which orb pairs are within their alignment threshold at each of the
+        passed in times.
+
+        Parameters
+        ---------
+            times: `np.ndarray`
+                A 1-D array of epoch timestamps in ms at which orb positions are retrieved.
+        Returns
+        ---------
+        `np.ndarray[bool]`
+            An (N x 36) array that is True where the pair, ordered by `self.pairIndices`, is aligned.
+        """
+        difs = self.calcAlignmentDifsBatch(self.posRelCandleBatch(times))
+        # pairs involving the shadow orb use the larger dark threshold
+        thresholds = np.where(
+            self.pairIndices[0] == 0, self.darkThresh, self.glowThresh
+        )
+        return difs < thresholds
+
     def calcAlignmentDifs(
         self, positions: np.ndarray[float]
     ) -> list[np.ndarray[float]]:
@@ -483,6 +1569,27 @@ class Ephemeris:
             difs.append(tempArr)
         return difs
 
+    def calcAlignmentDifsBatch(self, positions: np.ndarray[float]) -> np.ndarray[float]:
+        """Vectorized version of `calcAlignmentDifs` that calculates the difference between the
+        positions of every pair of orbs for many sets of positions at once.
+
+        Parameters
+        ---------
+            positions: `np.ndarray[float]`
+                An (N x 9) array of angular positions in degrees of each orb relative to the candle.
+        Returns
+        ---------
+        `np.ndarray[float]`
+            An (N x 36) array of angular differences ordered by `self.pairIndices`, which matches
+            the concatenated output of `calcAlignmentDifs`.
+        """
+        positions = positions % 180
+        difs = abs(
+            positions[:, self.pairIndices[1]] - positions[:, self.pairIndices[0]]
+        )
+        # if the dif is greater than 90, use 180 minus value to check for opposite alignments
+        return np.where(difs > 90, 180 - difs, difs)
+
     def posRelCandle(self, time: int) -> np.ndarray[float]:
         """Gets the position of each orb relative to the candle (earth equivalent)
 
@@ -508,6 +1615,32 @@ class Ephemeris:
         positions = np.append(positions, (np.degrees(np.arctan2(y, x))) % 360)
         return positions
 
+    def posRelCandleBatch(self, times: np.ndarray) -> np.ndarray[float]:
+        """Vectorized version of `posRelCandle` that gets the position of each orb relative to
+        the candle at every passed in time.
+
+        Parameters
+        ---------
+            times: `np.ndarray`
+                A 1-D array of epoch timestamps in ms at which the orb positions are retrieved.
+        Returns
+        ---------
+        `np.ndarray[float]`
+            An (N x 9) array with each row holding the positions of the orbs relative to the candle
+            at the corresponding time, in the same order as `posRelCandle`.
+        """
+        rw = self.posRelWhiteBatch(times)
+        positions = np.empty((len(rw), 9))
+        positions[:, 0] = self.getShadowPosBatch(times)
+        positions[:, 1] = (rw[:, 0] + 180) % 360
+
+        candleRad = np.radians(rw[:, :1])
+        orbRad = np.radians(rw[:, 1:8])
+        x = self.radii[1:8] * np.cos(orbRad) - np.cos(candleRad)
+        y = self.radii[1:8] * np.sin(orbRad) - np.sin(candleRad)
+        positions[:, 2:] = (np.degrees(np.arctan2(y, x))) % 360
+        return positions
+
     def posRelWhite(self, time: int) -> np.ndarray[float]:
         """Calculates the position of each orb, excluding the shadow orb, relative to the
         white orb (sun equivalent)
@@ -529,6 +1662,25 @@ class Ephemeris:
         positions[0] = (positions[0] + 180) % 360
         return positions
 
+    def posRelWhiteBatch(self, times: np.ndarray) -> np.ndarray[float]:
+        """Vectorized version of `posRelWhite` for a 1-D array of timestamps.
+
+        Parameters
+        ---------
+            times: `np.ndarray`
+                A 1-D array of epoch timestamps in ms at which the orb positions are retrieved.
+        Returns
+        ---------
+        `np.ndarray[float]`
+            An (N x 8) array with each row matching the output of `posRelWhite` at the corresponding time.
+        """
+        times = np.asarray(times)[:, np.newaxis]
+        positions = (
+            (360 / self.periods) * (times - self.refTimes) + self.refPositions
+        ) % 360
+        positions[:, 0] = (positions[:, 0] + 180) % 360
+        return positions
+
     def getShadowPos(self, time: int) -> float:
         """Calculates the position of the shadow orb (moon equivalent) relative to
         the candle (earth equivalent).
@@ -547,10 +1699,27 @@ class Ephemeris:
             + self.v["shadow"]["refOffset"]
         ) % 360
 
+    def getShadowPosBatch(self, times: np.ndarray) -> np.ndarray[float]:
+        """Vectorized version of `getShadowPos` for a 1-D array of timestamps.
+
+        Parameters
+        ---------
+            times: `np.ndarray`
+                A 1-D array of epoch timestamps in ms at which the shadow orb position is calculated.
+        Returns
+        ---------
+        `np.ndarray[float]`
+            The position of the shadow orb relative to the candle at each of the passed in times.
+        """
+        return (
+            (360 / self.v["shadow"]["period"])
+            * (np.asarray(times) - self.v["shadow"]["refTime"])
+            + self.v["shadow"]["refOffset"]
+        ) % 360
+
     def setRefPositions(self) -> None:
         """Calculates and stores the positions of each orb during their experimentally sampled
-        reference times in self.refOffsets for future calculations.
-        Updates variables.json to reflect these calculations
+        reference times in self.v for future calculations.
         """
 
         # note the shadow orb refOffset and refTime is experimentally gathered to
@@ -578,7 +1747,22 @@ class Ephemeris:
         self.v["cyan"]["refPos"] = posList[5]
         self.v["blue"]["refPos"] = posList[6]
 
-        self.updateVariables()
+    def setVariables(self, variables: dict[str, dict]) -> None:
+        """Replaces the orb variables and recalculates the arrays and reference positions
+        derived from them.
+
+        Parameters
+        ---------
+            variables: `dict[str, dict]`
+                The orb variables, in the same format as variables.json.
+        """
+        self.v = variables
+        self.periods = self.getPeriods()
+        self.radii = self.getRadii()
+        self.refTimes = self.getRefTimes()
+        self.refOffsets = self.getRefOffsets()
+        self.setRefPositions()
+        self.refPositions = self.getRefPositions()
 
     def getPeriods(self) -> np.ndarray[int]:
         """Gets the stored periods from self.v and packages them in an array to more easily parse.
@@ -693,16 +1877,85 @@ class Ephemeris:
         )
 
     def saveCache(self, fileLoc: Path) -> None:
-        """Saves the scroll event cache a JSON file.
+        """Saves the scroll event cache to a binary cache file, along with a hash of the orbital
+        variables and the time range the cache covers.
 
         Parameters
         ---------
             fileLoc: `Path`
-                The path to the JSON file the event cache data will be saved to.
+                The path to the binary file the event cache data will be saved to.
         """
-        json_object = json.dumps(self.scrollEventsCache, indent=4)
-        with open(fileLoc, "w") as outfile:
-            outfile.write(json_object)
+        self.scrollEventsCache.save(
+            fileLoc,
+            self.getVariablesHash(),
+            self.scrollCacheStart,
+            self.scrollCacheStop,
+        )
+
+    def loadCache(self, fileLoc: Path) -> tuple[CacheHeader, ScrollEventStore] | None:
+        """Loads a scroll event cache saved by `saveCache`, as long as it was calculated with
+        the current orbital variables.
+
+        Parameters
+        ---------
+            fileLoc: `Path`
+                The path to the binary file the event cache data was saved to.
+
+        Returns
+        ---------
+            `tuple[CacheHeader, ScrollEventStore] | None`
+                The cache file's header and events, or None if there is no usable cache file.
+        """
+        cache = ScrollEventStore.load(fileLoc, self.discordTimestamps)
+        if cache is None:
+            return None
+        if cache[0].variablesHash != self.getVariablesHash():
+            print(f"{fileLoc} was calculated with different orbital variables")
+            return None
+        return cache
+
+    def loadScrollCache(self, start: int) -> bool:
+        """Replaces the scroll event cache with the one saved to `self.cacheFile`, as long as it
+        was calculated with the current orbital variables and covers start. Events before start
+        are dropped.
+
+        Parameters
+        ---------
+            start: `int`
+                The epoch time in ms that the loaded cache needs to cover from.
+
+        Returns
+        ---------
+            `bool`
+                True if the saved cache was loaded.
+        """
+        cache = self.loadCache(self.cacheFile)
+        if cache is None:
+            return False
+        header = cache[0]
+        if not header.startTime <= start < header.stopTime:
+            print(f"{self.cacheFile} does not cover the requested time range")
+            return False
+        self.scrollEventsCache = cache[1]
+        self.cacheGeneration += 1
+        self.scrollCacheStart = header.startTime
+        self.scrollCacheStop = header.stopTime
+        self.trimScrollCache(start)
+        print(f"Loaded {len(self.scrollEventsCache)} events from {self.cacheFile}")
+        return True
+
+    def getVariablesHash(self) -> bytes:
+        """Hashes the orbital variables and calculation settings that the scroll events depend on.
+
+        Returns
+        ---------
+            `bytes`
+                The 32 byte SHA-256 digest of the variables.
+        """
+        # discord timestamps are only added when the event dicts are built, so they don't
+        # change the cached events
+        params = self.getOrbitalParameters()._replace(discordTimestamps=False)
+        return hashlib.sha256(json.dumps(params._asdict()).encode()).digest()
 
     def updateVariables(self) -> None:
         """Overwrites the JSON file containing the orb variables with the current
@@ -730,28 +1983,6 @@ class Ephemeris:
             variables = json.load(json_file)
         return variables
 
-    # # used to update the event cache at set intervals (may slightly improve accuracy) instead of when
-    # # an event is requested outside of the cache range, not actively used in prod
-    # def autoRefreshCache(self, refreshRate:int=60 * 60 * 12):
-    #     """Updates variables with any more recent and reference times received then automatically re-calculate
-    #     event the cache. Should Be used with an asynchronous wrapper.
-
-    #     Parameters
-    #     ---------
-    #         refreshRate: `int`
-    #             The time interval in seconds between event cache recalculations
-    #     """
-    #     while True:
-    #         #time.sleep(refreshRate)
-    #         self.updateRefTimes()
-    #         self.createScrollEventRange(
-    #             startTime=(time.time() * 1000) - 2 * 86400000,
-    #             stopTime=(time.time() * 1000) + 12 * 86400000,
-    #             saveToCache=True
-    #         )
-    #         print("New Cache Last Item:", self.scrollEventsCache[-1])
-    #         time.sleep(60*3)
-
     def updateScrollCache(self, start: int, stop: int) -> None:
         """Updates the reference time and position of each orb and overwrites the current
         scroll event cache with a new one.
@@ -767,6 +1998,181 @@ class Ephemeris:
         self.createScrollEventRange(startTime=start, stopTime=stop, saveToCache=True)
         # print("New Cache Last Item:", self.eventsCache[-1])
 
+    def extendScrollCache(self, newStop: int) -> None:
+        """Extends the scroll event cache up to newStop by only calculating the events
+        between the end of the current cache and newStop. Unlike `updateScrollCache`, the
+        orb variables are not updated, so the new events are consistent with the cached ones.
+
+        Parameters
+        ------------
+        newStop: `int`
+            The epoch time in ms that the cache should cover up to.
+        """
+        if newStop <= self.scrollCacheStop:
+            return
+        self.scrollEventsCache = ScrollEventStore.concatenate(
+            [self.scrollEventsCache, self.getScrollCacheTail(newStop)],
+            self.discordTimestamps,
+        )
+        self.cacheGeneration += 1
+        self.scrollCacheStop = newStop
+        self.saveCache(self.cacheFile)
+
+    def getScrollCacheTail(self, newStop: int) -> ScrollEventStore:
+        """Calculates the events between the end of the current scroll event cache and newStop.
+
+        Parameters
+        ------------
+        newStop: `int`
+            The epoch time in ms that the events should be calculated up to.
+
+        Returns
+        ---------
+        `ScrollEventStore`
+            The chronologically ordered events after the end of the current cache.
+        """
+        # the states during the last ms covered by the cache, so a change that lands
+        # exactly on the old stop time isn't dropped
+        lastAlignmentMask = self.getAlignmentMask(
+            self.scrollCacheStop - self.refinePrecision
+        )
+        return self.processScrollTimeRange(
+            self.scrollCacheStop,
+            newStop,
+            startAlignmentMask=lastAlignmentMask,
+        )
+
+    def refreshCaches(
+        self, start: int, stop: int, moonStart: int, numMoonCycles: int
+    ) -> tuple[dict[str, dict], ScrollEventStore, int, int, LunarEventStore]:
+        """Reads the latest reference times, then calculates new scroll and lunar caches with them
+        on a copy of the instance, so it can run in a background thread while the current orb
+        variables and caches are still in use. When the orb variables are unchanged only the scroll
+        events after the end of the current cache are calculated. The new scroll event cache is saved
+        to `self.cacheFile` before returning. Pass the result to `swapCaches`.
+
+        Parameters
+        ------------
+        start: `int`
+            The epoch time in ms that the new scroll event cache will start from.
+        stop: `int`
+            The epoch time in ms that the new scroll event cache will cover up to.
+        moonStart: `int`
+            The epoch time in ms that the new lunar calendar will start from.
+        numMoonCycles: `int`
+            The number of synodic months that are calculated.
+
+        Returns
+        ---------
+        `tuple[dict[str, dict], ScrollEventStore, int, int, LunarEventStore]`
+            The updated orb variables, the new scroll event cache, the time range in ms that it
+            covers, and the new lunar calendar.
+        """
+        # convert float to int
+        start = int(start)
+        stop = int(stop)
+        # the instance's own variables and arrays are only replaced by swapCaches
+        refreshed = copy.copy(self)
+        refreshed.setVariables(self.getUpdatedVariables())
+        try:
+            if (
+                refreshed.getVariablesHash() == self.getVariablesHash()
+                and self.scrollCacheStart <= start < self.scrollCacheStop
+            ):
+                startIndex, _ = self.scrollEventsCache.getRangeIndices(start, start)
+                scrollEventsCache = self.scrollEventsCache[startIndex:]
+                scrollCacheStop = self.scrollCacheStop
+                if stop > scrollCacheStop:
+                    scrollEventsCache = ScrollEventStore.concatenate(
+                        [scrollEventsCache, refreshed.getScrollCacheTail(stop)],
+                        self.discordTimestamps,
+                    )
+                    scrollCacheStop = stop
+            else:
+                scrollEventsCache = refreshed.multiProcessCreateScrollEventRange(
+                    start, stop
+                )
+                scrollCacheStop = stop
+            moonCyclesCache = refreshed.createLunarCalendar(moonStart, numMoonCycles)
+        finally:
+            # the worker pool belongs to this instance even if the copy started it
+            self.processPool = refreshed.processPool
+        # hand back the current stores when their events didn't change so swapCaches can keep
+        # everything derived from them
+        if scrollEventsCache == self.scrollEventsCache:
+            scrollEventsCache = self.scrollEventsCache
+        if moonCyclesCache == self.moonCyclesCache:
+            moonCyclesCache = self.moonCyclesCache
+        if refreshed.v != self.v:
+            refreshed.updateVariables()
+        # saved here so swapCaches only has to swap references
+        refreshed.scrollEventsCache = scrollEventsCache
+        refreshed.scrollCacheStart = start
+        refreshed.scrollCacheStop = scrollCacheStop
+        refreshed.saveCache(refreshed.cacheFile)
+        return (
+            refreshed.v,
+            scrollEventsCache,
+            start,
+            scrollCacheStop,
+            moonCyclesCache,
+        )
+
+    def swapCaches(
+        self,
+        variables: dict[str, dict],
+        scrollEventsCache: ScrollEventStore,
+        scrollCacheStart: int,
+        scrollCacheStop: int,
+        moonCyclesCache: LunarEventStore,
+    ) -> None:
+        """Replaces the current orb variables and caches with the ones calculated by `refreshCaches`.
+        Should be called from the thread that reads the caches so they are never seen partially
+        replaced.
+
+        Parameters
+        ------------
+        variables: `dict[str, dict]`
+            The orb variables the new caches were calculated with.
+        scrollEventsCache: `ScrollEventStore`
+            The new scroll event cache.
+        scrollCacheStart: `int`
+            The epoch time in ms that the new scroll event cache starts from.
+        scrollCacheStop: `int`
+            The epoch time in ms that the new scroll event cache covers up to.
+        moonCyclesCache: `LunarEventStore`
+            The new lunar calendar.
+        """
+        changed = (
+            variables != self.v
+            or scrollEventsCache is not self.scrollEventsCache
+            or moonCyclesCache is not self.moonCyclesCache
+        )
+        if variables != self.v:
+            self.setVariables(variables)
+        self.scrollEventsCache = scrollEventsCache
+        self.scrollCacheStart = scrollCacheStart
+        self.scrollCacheStop = scrollCacheStop
+        self.moonCyclesCache = moonCyclesCache
+        # responses rendered from unchanged stores are still valid
+        if changed:
+            self.cacheGeneration += 1
+
+    def trimScrollCache(self, retainFrom: int) -> None:
+        """Drops the events in the scroll event cache that happen before retainFrom.
+
+        Parameters
+        ------------
+        retainFrom: `int`
+            The epoch time in ms of the earliest event that should be kept in the cache.
+        """
+        if retainFrom <= self.scrollCacheStart:
+            return
+        startIndex, _ = self.scrollEventsCache.getRangeIndices(retainFrom, retainFrom)
+        self.scrollEventsCache = self.scrollEventsCache[startIndex:]
+        self.cacheGeneration += 1
+        self.scrollCacheStart = retainFrom
+
     def updateMoonCache(self, start: int, numMoonCycles: int) -> None:
         """Updates the reference time and position of each orb and overwrites the current
         scroll event cache with a new one.
@@ -780,12 +2186,32 @@ class Ephemeris:
         """
         self.updateRefTimes()
         self.moonCyclesCache = self.createLunarCalendar(start, numMoonCycles)
+        self.cacheGeneration += 1
 
     def updateRefTimes(self) -> None:
         """Parses newRefTimes.json which may contain more recent reference times for the orbs.
         Screens new reference times to make sure they're within an expected range and updates the variables
         and variables.json file to reflect the new valid reference times.
         """
+        variables = self.getUpdatedVariables()
+        if variables == self.v:
+            return
+        self.setVariables(variables)
+        self.cacheGeneration += 1
+        # Update the variables file to match the new refTimes
+        self.updateVariables()
+
+    def getUpdatedVariables(self) -> dict[str, dict]:
+        """Parses newRefTimes.json which may contain more recent reference times for the orbs.
+        Screens new reference times to make sure they're within an expected range and returns a
+        copy of the variables with the new valid reference times, without changing the instance.
+
+        Returns
+        ---------
+            `dict[str, dict]`
+                The updated orb variables, pass them to `setVariables` to use them.
+        """
+        variables = copy.deepcopy(self.v)
         newVars: dict[str, list[int]] = {}
         with self.newRefTimeFile.open("r") as f:
             newVars = json.load(f)
@@ -794,7 +2220,7 @@ class Ephemeris:
             compOrb = orb if orb != "white" else "candle"
             # Check if current ref time is most recent refTime and check that it's within an expected alignment time range
             if (
-                self.v[compOrb]["refTime"]
+                variables[compOrb]["refTime"]
                 != (newVars[orb][0] + newVars[orb][1] - 500) / 2
             ) and self.checkValidRefTime(orb, newVars[orb]):
                 # average two times then subtract the total average time the events are off by
@@ -821,17 +2247,9 @@ class Ephemeris:
                 if refOffset == 360:
                     refOffset = 0
                 # update variables
-                self.v[orb]["refTime"] = eventTime
-                self.v[orb]["refOffset"] = refOffset
-        # reset arrays used to calculate events
-        self.periods = self.getPeriods()
-        self.radii = self.getRadii()
-        self.refTimes = self.getRefTimes()
-        self.refOffsets = self.getRefOffsets()
-        self.setRefPositions()
-        self.refPositions = self.getRefPositions()
-        # Update the variables file to match the new refTimes
-        self.updateVariables()
+                variables[orb]["refTime"] = eventTime
+                variables[orb]["refOffset"] = refOffset
+        return variables
 
     def checkValidRefTime(self, orb: str, refTimes: list[int]) -> bool:
         """Creates a small scroll event cache overlapping the first refTime in order to check if
@@ -879,9 +2297,91 @@ class Ephemeris:
 
     def createLunarCalendar(
         self, startTime: int, numMoonCycles: int
+    ) -> LunarEventStore:
+        """Creates a chronologically ordered store of moon phase changes.
+
+        The shadow and white orbs move at constant rates, so the angle between them (the moon's
+        phase angle) grows by the same amount every Aberoth day. That bounds the number of days
+        needed up front, so the phase angle at every noon is calculated in one vectorized pass
+        and the noons on which it crosses 0, 90, 180, and 270 degrees are found directly.
+
+        Parameters
+        ---------
+            startTime: `int`
+                The epoch time in ms for which events after will recorded
+            numMoonCycles: `int`
+                The number of events for each phase that will be recorded
+
+        Returns
+        ---------
+            `LunarEventStore`
+                A store containing the epoch time at which each moon phase change happens and
+                the new phase.
+        """
+        if numMoonCycles == 0:
+            return LunarEventStore()
+
+        # 8 phases in one moon cycle plus almost full and almost new, each primary phase
+        # found adds itself and the phase that follows it
+        numPhases = numMoonCycles * 5
+        # phases change at noon so the phase angle is sampled at every noon from the previous one
+        firstNoonTime = self.getLastNoonTime(startTime)
+        # change in the phase angle over one aberoth day
+        dailyAngle = abs(
+            360 * self.oneAberothDay / self.v["shadow"]["period"]
+            - 360 * self.oneAberothDay / self.periods[0]
+        )
+        # a primary phase happens every 90 degrees, with a few spare days for the rounding
+        numDays = int(np.ceil((numPhases + 1) * 90 / dailyAngle)) + 6
+        phaseDays = []
+        while len(phaseDays) < numPhases:
+            noonTimes = firstNoonTime + np.arange(numDays + 1) * self.oneAberothDay
+            # get the position of the moon from the perspective of the earth
+            # in the frame of reference where the sun is fixed at 180 degrees relative to the earth
+            lunarCyclePos = (
+                self.getShadowPosBatch(noonTimes)
+                - self.getWhitePosBatch(noonTimes)
+                + 360
+            ) % 360
+            lunarCycleStartPos = lunarCyclePos[:-1]
+            lunarCycleEndPos = lunarCyclePos[1:]
+            dayPhases = np.select(
+                [
+                    # new moon occur on a night that the moon crosses the 360/0 degree threshold
+                    (lunarCycleStartPos < 360)
+                    & (lunarCycleStartPos > 347.5)
+                    & ((lunarCycleEndPos > 360) | (lunarCycleEndPos < 12.5)),
+                    # the quarters and full moon occur on the night the moon crosses 90, 180, or 270 degrees
+                    (lunarCycleStartPos < 90) & (lunarCycleEndPos > 90),
+                    (lunarCycleStartPos < 180) & (lunarCycleEndPos > 180),
+                    (lunarCycleStartPos < 270) & (lunarCycleEndPos > 270),
+                ],
+                [0, 1, 2, 3],
+                -1,
+            )
+            # every phase except the explicitly checked ones last 5 to 6 days, so a crossing
+            # within 5 days of the last primary phase isn't counted
+            phaseDays = []
+            nextDay = 0
+            for day in np.flatnonzero(dayPhases >= 0).tolist():
+                if day >= nextDay:
+                    phaseDays.append(day)
+                    nextDay = day + 5
+            numDays *= 2
+
+        # each primary phase is followed by the intermediate phase that starts a day later
+        days = np.repeat(phaseDays[:numPhases], 2) + np.tile([0, 1], numPhases)
+        primaryCodes = 2 * dayPhases[phaseDays[:numPhases]]
+        return LunarEventStore(
+            firstNoonTime + days * self.oneAberothDay,
+            np.stack([primaryCodes, primaryCodes + 1], axis=1).ravel(),
+        )
+
+    def createLunarCalendarScalar(
+        self, startTime: int, numMoonCycles: int
     ) -> list[tuple[int, dict[str, any]]]:
-        """Creates a chronologically ordered `list` of `tuples` that each
-        contain information about a moon phase change.
+        """Reference implementation of `createLunarCalendar` that walks forward one Aberoth day
+        at a time. Slow, but useful for validating the vectorized solver.
 
         Parameters
         ---------
@@ -894,7 +2394,7 @@ class Ephemeris:
         ---------
             `list[tuple[int, dict[str, any]]]`
                 A `list` of `tuples` containing the epoch time at which the moon phase change happens and
-                a dictionary containing the name of the new phase and a discord timestamp for the event.
+                a dictionary containing the name of the new phase.
         """
         if numMoonCycles == 0:
             return []
@@ -950,21 +2450,13 @@ class Ephemeris:
                 tempCache.append(
                     (
                         currentTime,
-                        {
-                            "phase": phase,
-                            "discordTS": f"<t:{int(np.floor(currentTime/1000))}:D> <t:{int(np.floor(currentTime/1000))}:t>",
-                            # "discordRelTS": f'<t:{np.floor(currentTime/1000)}:R>'
-                        },
+                        {"phase": phase},
                     )
                 )
                 tempCache.append(
                     (
                         nextNoonTime,
-                        {
-                            "phase": nextPhase,
-                            "discordTS": f"<t:{int(np.floor(nextNoonTime/1000))}:D> <t:{int(np.floor(nextNoonTime/1000))}:t>",
-                            # "discordRelTS": f'<t:{np.floor(nextNoonTime/1000)}:R>'
-                        },
+                        {"phase": nextPhase},
                     )
                 )
                 # every phase except the explicitly checked ones last 5 to 6 days
@@ -976,20 +2468,6 @@ class Ephemeris:
                 dayStartWPos = dayEndWPos
                 dayStartSPos = dayEndSPos
                 currentTime = nextNoonTime
-        # print(tempCache)
-        firstPhase = tempCache[0][1]["phase"]
-        previousPhase = ""
-        if firstPhase == "new":
-            previousPhase = "waning_crescent"
-        elif firstPhase == "first_quarter":
-            previousPhase = "waxing_crescent"
-        elif firstPhase == "full":
-            previousPhase = "waxing_gibbous"
-        elif firstPhase == "third_quarter":
-            previousPhase = "waning_gibbous"
-
-        # tempCache.insert(0, previousPhase)
-        # print(tempCache)
         return tempCache
 
     def getLastNoonTime(self, time: int) -> int:
@@ -1025,6 +2503,63 @@ class Ephemeris:
         ) % 360
         return position
 
+    def getWhitePosBatch(self, times: np.ndarray) -> np.ndarray[float]:
+        """Vectorized version of `getWhitePos` for a 1-D array of timestamps.
+
+        Parameters
+        ---------
+            times: `np.ndarray`
+                A 1-D array of epoch timestamps in ms at which the white orb position is calculated.
+
+        Returns
+        ---------
+            `np.ndarray[float]`
+                The position of the white orb in degrees at each of the passed in times.
+        """
+        return (
+            (360 / self.periods[0]) * (np.asarray(times) - self.refTimes[0])
+            + self.refPositions[0]
+        ) % 360
+
+
+# lightweight instance reused by a worker process for as long as the orbital variables don't change
+workerEphemeris = None
+
+
+def processScrollTimeRangeWorker(
+    params: OrbitalParameters,
+    startTime: int,
+    stopTime: int,
+    chunkNum: int = None,
+    startAlignmentMask: int | None = None,
+) -> ScrollEventStore:
+    """Runs `Ephemeris.processScrollTimeRange` in a worker process, only rebuilding the
+    worker's instance when the passed in orbital variables have changed.
+
+    Parameters
+    ---------
+        params: `OrbitalParameters`
+            The orbital variables and calculation settings to use.
+        startTime: `int`
+            An epoch timestamp in ms that represents the time at which calculations will start at.
+        stopTime: `int`
+            An epoch timestamp in ms that represents the time at which calculations will stop at.
+        chunkNum: `int`
+            An integer that indicates where in the final cache the results should be inserted.
+        startAlignmentMask: `int` *(optional)*
+            The alignment mask leading into startTime. Defaults to None.
+    Returns
+    ---------
+        `ScrollEventStore`
+        The chronologically ordered events, each containing information about the changed phases.
+    """
+    global workerEphemeris
+    if workerEphemeris is None or workerEphemeris.orbitalParameters != params:
+        workerEphemeris = Ephemeris.fromOrbitalParameters(params)
+    return workerEphemeris.processScrollTimeRange(
+        startTime, stopTime, chunkNum, startAlignmentMask
+    )
+
 
 def formatTime(milliseconds: int) -> str:
     """Takes in a length of time in milliseconds and formats it into h:m:s:ms format.
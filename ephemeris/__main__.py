@@ -2,7 +2,6 @@ from .discordBot import bot, ephemeris
 from .Ephemeris import Ephemeris
 import os
 import time
-from multiprocessing import Process
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,6 +12,4 @@ def main():
 
 
 if __name__ == "__main__":
-    # refreshCacheProcess = Process(target=ephemeris.autoRefreshCache)
-    # refreshCacheProcess.start()
     main()
@@ -1,26 +1,28 @@
+import asyncio
 import time
-from peewee import fn
+from functools import partial
 from discord.ext import tasks
 from .guildScrollMenus import *
 from .guildLunarMenus import *
-from .helperFuncs import splitMsg
-from .usageGraphs import build_usage_graph
-from .configFiles.usageDataBase import (
-    UsageEvent,
-    get_source_breakdown,
-    get_top_guilds,
-)
+from .helperFuncs import splitMsg, refreshEphemerisCaches, flushUsageEvents
+from .usageGraphs import render_usage_graph, shutdown_graph_worker
+from .configFiles.usageDataBase import get_usage_summary
 from .configFiles.variables import (
     ENABLE_USAGE_LOGGING,
     ENABLE_USAGE_REPORTS,
     USAGE_REPORT_INTERVAL_HOURS,
     USAGE_REPORT_CHANNEL_ID,
+    CACHE_REFRESH_INTERVAL_HOURS,
+    USAGE_LOG_FLUSH_SECONDS,
     ownerID,
 )
 
 REPORT_INTERVAL_HOURS = (
     USAGE_REPORT_INTERVAL_HOURS if USAGE_REPORT_INTERVAL_HOURS > 0 else 24
 )
+REFRESH_INTERVAL_HOURS = (
+    CACHE_REFRESH_INTERVAL_HOURS if CACHE_REFRESH_INTERVAL_HOURS > 0 else 6
+)
 
 
 # allows for menus to persist and continue working between bot restarts
@@ -33,6 +35,16 @@ class PersistentViewBot(commands.Bot):
         self.add_view(GuildScrollMenu(allow_filters=1, setUp=False))
         self.add_view(GuildLunarMenu())
 
+    async def close(self) -> None:
+        # write the usage events that are still queued before shutting down
+        try:
+            await flushUsageEvents()
+        except Exception as e:
+            print(f"Usage flush error: {e}")
+        shutdown_graph_worker()
+        ephemeris.shutdownProcessPool()
+        await super().close()
+
 
 bot = PersistentViewBot()
 
@@ -45,6 +57,10 @@ async def on_ready():
         print(f"synched {len(synched)} command(s)")
     except Exception as e:
         print(e)
+    if not cache_refresh_task.is_running():
+        cache_refresh_task.start()
+    if ENABLE_USAGE_LOGGING and not usage_flush_task.is_running():
+        usage_flush_task.start()
     if (
         ENABLE_USAGE_REPORTS
         and ENABLE_USAGE_LOGGING
@@ -54,13 +70,14 @@ async def on_ready():
         usage_report_task.start()
 
 
-def _format_usage_report(range_label: str, start_ts: int, end_ts: int) -> list[str]:
-    filters = [UsageEvent.ts.between(start_ts, end_ts)]
-    total_count = UsageEvent.select().where(*filters).count()
-    unique_users = (
-        UsageEvent.select(UsageEvent.user_id).where(*filters).distinct().count()
+async def _format_usage_report(
+    range_label: str, start_ts: int, end_ts: int
+) -> list[str]:
+    summary = await asyncio.get_running_loop().run_in_executor(
+        None, partial(get_usage_summary, start_ts, end_ts, top_users=5)
     )
-    source_counts = get_source_breakdown(start_ts, end_ts)
+    total_count = summary["total"]
+    source_counts = summary["sources"]
     scroll_sources = source_counts.get(
         "scroll", {"guild": 0, "user_install": 0, "unknown": 0}
     )
@@ -79,37 +96,18 @@ def _format_usage_report(range_label: str, start_ts: int, end_ts: int) -> list[s
     if lunar_sources["unknown"] > 0:
         lunar_source_summary += f", unknown {lunar_sources['unknown']}"
     lunar_source_summary += ")"
-    feature_query = (
-        UsageEvent.select(
-            UsageEvent.feature, fn.COUNT(UsageEvent.id).alias("count")
-        )
-        .where(*filters)
-        .group_by(UsageEvent.feature)
-        .order_by(fn.COUNT(UsageEvent.id).desc())
-    )
     feature_parts = []
-    for row in feature_query:
-        feature_parts.append(f"{row.feature}: {row.count}")
+    for feature, count in summary["features"]:
+        feature_parts.append(f"{feature}: {count}")
     feature_summary = ", ".join(feature_parts) if feature_parts else "none"
-    top_users = (
-        UsageEvent.select(
-            UsageEvent.username,
-            UsageEvent.user_id,
-            fn.COUNT(UsageEvent.id).alias("count"),
-        )
-        .where(*filters)
-        .group_by(UsageEvent.user_id, UsageEvent.username)
-        .order_by(fn.COUNT(UsageEvent.id).desc())
-        .limit(5)
-    )
     lines = [
         f"**{range_label}** (<t:{start_ts}:d> - <t:{end_ts}:d>)",
         f"**Total events:** {total_count}",
-        f"**Unique users:** {unique_users}",
+        f"**Unique users:** {summary['unique_users']}",
         f"**By feature:** {feature_summary}",
         f"**By install:** {scroll_source_summary}, {lunar_source_summary}",
     ]
-    top_guilds = get_top_guilds(start_ts, end_ts, limit=5)
+    top_guilds = summary["top_guilds"]
     if top_guilds:
         lines.append("**Top guilds:**")
         for guild_id, count in top_guilds:
@@ -123,8 +121,8 @@ def _format_usage_report(range_label: str, start_ts: int, end_ts: int) -> list[s
         lines.append("**Top guilds:** none")
     if total_count > 0:
         lines.append("**Top users:**")
-        for row in top_users:
-            lines.append(f"- {row.username} ({row.user_id}): {row.count}")
+        for username, user_id, count in summary["top_users"]:
+            lines.append(f"- {username} ({user_id}): {count}")
     return lines
 
 
@@ -133,6 +131,8 @@ async def usage_report_task():
     if not ENABLE_USAGE_REPORTS or not ENABLE_USAGE_LOGGING:
         return
     try:
+        # include the events that are still queued
+        await flushUsageEvents()
         now = int(time.time())
         daily_start = now - 86400
         weekly_start = now - 7 * 86400
@@ -143,13 +143,13 @@ async def usage_report_task():
             graph_line,
             "",
         ]
-        lines.extend(_format_usage_report("Daily (last 24h)", daily_start, now))
+        lines.extend(await _format_usage_report("Daily (last 24h)", daily_start, now))
         lines.append("")
-        lines.extend(_format_usage_report("Weekly (last 7d)", weekly_start, now))
+        lines.extend(await _format_usage_report("Weekly (last 7d)", weekly_start, now))
         message = "\n".join(lines)
 
         graph_file = None
-        buf, error = build_usage_graph(
+        buf, error = await render_usage_graph(
             start_ts=weekly_start,
             end_ts=now,
         )
@@ -189,3 +189,26 @@ async def usage_report_task():
 @usage_report_task.before_loop
 async def usage_report_task_before_loop():
     await bot.wait_until_ready()
+
+
+@tasks.loop(hours=REFRESH_INTERVAL_HOURS)
+async def cache_refresh_task():
+    # extends the scroll and lunar caches well before users can request events past their end
+    try:
+        await refreshEphemerisCaches()
+    except Exception as e:
+        print(f"Cache refresh task error: {e}")
+
+
+@cache_refresh_task.before_loop
+async def cache_refresh_task_before_loop():
+    await bot.wait_until_ready()
+
+
+@tasks.loop(seconds=USAGE_LOG_FLUSH_SECONDS)
+async def usage_flush_task():
+    # writes the queued usage events in one transaction instead of one per interaction
+    try:
+        await flushUsageEvents()
+    except Exception as e:
+        print(f"Usage flush task error: {e}")
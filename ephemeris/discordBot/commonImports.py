@@ -1,5 +1,4 @@
 import time
-import copy
 from typing import Optional
 import discord.types
 from regex import match
@@ -13,6 +12,7 @@ ephemeris = Ephemeris.Ephemeris(
     start=(time.time() * 1000) + -4 * oneDay,
     end=(time.time() * 1000) + 35 * oneDay,
     numMoonCycles=numMoonCycles,
-    discordTimestamps=True,
+    discordTimestamps=False,
     multiProcess=True,
+    warmStart=True,
 )
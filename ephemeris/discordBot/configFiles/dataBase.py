@@ -1,15 +1,18 @@
+import copy
 import json
+import time
+from collections import OrderedDict
 from peewee import (
     Model,
-    SqliteDatabase,
     CharField,
     IntegerField,
     TextField,
     ForeignKeyField,
 )
+from .sqliteDatabase import create_sqlite_database
 
 # Connect to the SQLite database
-db = SqliteDatabase("ephemeris\\discordBot\\configFiles\\bot_DB.db")
+db = create_sqlite_database("BOT_DB_PATH", "ephemeris/discordBot/configFiles/bot_DB.db")
 
 
 class BaseModel(Model):
@@ -66,6 +69,53 @@ db.create_tables(
     [GuildSettings, GuildEmojis, GuildChannelSettings, UserSettings, UserEmojis]
 )
 
+# Settings cache
+
+# Maximum number of guild and user settings kept in memory
+SETTINGS_CACHE_SIZE = 1024
+# Seconds before cached settings are read from the database again
+SETTINGS_CACHE_TTL = 300
+
+
+class SettingsCache:
+    """
+    A least recently used cache of settings dicts that expire after ttl seconds.
+    Copies are stored and returned so callers can modify the dicts they fetch.
+    """
+
+    def __init__(self, max_size=SETTINGS_CACHE_SIZE, ttl=SETTINGS_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, settings = entry
+        if expires < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return copy.deepcopy(settings)
+
+    def put(self, key, settings):
+        self.entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(settings))
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+
+# keyed by the id as a string since ids are passed in as both ints and strings
+guild_settings_cache = SettingsCache()
+user_settings_cache = SettingsCache()
+
 # Helper Functions
 
 
@@ -73,6 +123,9 @@ def fetch_guild_settings(guild_id):
     """
     Fetch all settings for a specific guild, including emojis and channel filters.
     """
+    cached = guild_settings_cache.get(str(guild_id))
+    if cached is not None:
+        return cached
     guild = GuildSettings.get_or_none(GuildSettings.guild_id == guild_id)
     if not guild:
         return None
@@ -92,19 +145,29 @@ def fetch_guild_settings(guild_id):
         }
         channels[channel.channel_id] = channel_data
 
-    return {
+    settings = {
         "guild_id": guild.guild_id,
         "guild_name": guild.guild_name,
         "expiration": guild.expiration,
         "emojis": emojis,
         "channels": channels,
     }
+    guild_settings_cache.put(str(guild_id), settings)
+    return settings
 
 
 def update_guild_settings(guild_id, guild_data):
     """
     Update the settings for a specific guild and its channels.
     """
+    try:
+        _update_guild_settings(guild_id, guild_data)
+    finally:
+        # the next fetch reads the settings as they were saved
+        guild_settings_cache.invalidate(str(guild_id))
+
+
+def _update_guild_settings(guild_id, guild_data):
     guild_settings, created = GuildSettings.get_or_create(
         guild_id=guild_id, defaults=guild_data
     )
@@ -151,6 +214,9 @@ def fetch_user_settings(user_id):
     """
     Fetch all settings for a specific user, including emojis.
     """
+    cached = user_settings_cache.get(str(user_id))
+    if cached is not None:
+        return cached
     user = UserSettings.get_or_none(UserSettings.user_id == user_id)
     if not user:
         return None
@@ -158,18 +224,28 @@ def fetch_user_settings(user_id):
     # Fetch user emojis
     emojis = {emoji.emoji_name: emoji.emoji_value for emoji in user.emojis}
 
-    return {
+    settings = {
         "user_id": user.user_id,
         "username": user.username,
         "expiration": user.expiration,
         "emojis": emojis,
     }
+    user_settings_cache.put(str(user_id), settings)
+    return settings
 
 
 def update_user_settings(user_id, user_data):
     """
     Update the settings for a specific user.
     """
+    try:
+        _update_user_settings(user_id, user_data)
+    finally:
+        # the next fetch reads the settings as they were saved
+        user_settings_cache.invalidate(str(user_id))
+
+
+def _update_user_settings(user_id, user_data):
     user_settings, created = UserSettings.get_or_create(
         user_id=user_id, defaults=user_data
     )
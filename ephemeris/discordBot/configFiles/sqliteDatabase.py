@@ -0,0 +1,37 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+from peewee import SqliteDatabase
+
+load_dotenv()
+
+# Applied to every connection when it is opened
+SQLITE_PRAGMAS = {
+    # readers don't block the writer and the writer doesn't block readers
+    "journal_mode": "wal",
+    # with WAL only a power loss can lose the last commits, and never corrupts the database
+    "synchronous": "normal",
+    # negative values are in KiB, 32 MiB
+    "cache_size": -32 * 1024,
+    "mmap_size": 256 * 1024 * 1024,
+    # ms to wait for another connection's write lock before raising
+    "busy_timeout": 5000,
+}
+
+
+def create_sqlite_database(env_var: str, default_path: str) -> SqliteDatabase:
+    """
+    Create a SqliteDatabase at the path in the env_var environment variable, or at
+    default_path (relative to the working directory) when it isn't set. Each thread
+    that uses the database gets its own connection, opened with SQLITE_PRAGMAS.
+    """
+    env_path = os.getenv(env_var)
+    path = Path(env_path or default_path)
+    if not env_path and not path.exists():
+        # older versions used a Windows style path, which is a single file name on other platforms
+        legacy_path = Path(default_path.replace("/", "\\"))
+        if legacy_path.exists():
+            print(f"Using {legacy_path}, set {env_var} to move the database")
+            path = legacy_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return SqliteDatabase(str(path), pragmas=SQLITE_PRAGMAS, thread_safe=True)
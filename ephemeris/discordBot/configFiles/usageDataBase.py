@@ -1,10 +1,24 @@
 import json
 import time
+from collections import Counter, deque
 from typing import Optional
-from peewee import Model, SqliteDatabase, CharField, IntegerField, TextField, fn
+from peewee import (
+    Model,
+    CharField,
+    IntegerField,
+    TextField,
+    EXCLUDED,
+    chunked,
+    fn,
+)
+from playhouse.migrate import SqliteMigrator, migrate
+from .variables import USAGE_LOG_QUEUE_SIZE
+from .sqliteDatabase import create_sqlite_database
 
 # Connect to the SQLite database for usage tracking
-usage_db = SqliteDatabase("ephemeris\\discordBot\\configFiles\\usage_DB.db")
+usage_db = create_sqlite_database(
+    "USAGE_DB_PATH", "ephemeris/discordBot/configFiles/usage_DB.db"
+)
 
 
 class BaseModel(Model):
@@ -22,11 +36,72 @@ class UsageEvent(BaseModel):
     action = CharField(index=True)
     context = TextField(null=True)
     details = TextField(null=True)
+    # guild, user_install or unknown, null only for events logged before the column existed
+    source = CharField(null=True, index=True)
 
 
-# Create table
+class UsageDaily(BaseModel):
+    """Event counts per UTC day, rolled up from UsageEvent by compact_usage_rollups."""
+
+    day = IntegerField()  # ts // 86400
+    feature = CharField()
+    action = CharField()
+    # empty strings instead of nulls so the unique index matches events without them
+    context = TextField(default="")
+    source = CharField(default="")
+    guild_id = CharField(default="")
+    count = IntegerField(default=0)
+
+    class Meta:
+        indexes = (
+            (("day", "feature", "action", "context", "source", "guild_id"), True),
+        )
+
+
+class UsageDailyUser(BaseModel):
+    """The users that triggered events on each UTC day and how many they triggered."""
+
+    day = IntegerField()
+    user_id = CharField()
+    username = CharField()
+    count = IntegerField(default=0)
+
+    class Meta:
+        indexes = ((("day", "user_id"), True),)
+
+
+class UsageRollupState(BaseModel):
+    """The id of the last UsageEvent that has been added to the rollup tables."""
+
+    last_event_id = IntegerField(default=0)
+
+
+# Create tables
 usage_db.connect()
-usage_db.create_tables([UsageEvent])
+# Add the source column to databases created before it existed, this has to happen before
+# create_tables since SQLite would create its index on a string literal instead
+if UsageEvent.table_exists() and "source" not in [
+    column.name for column in usage_db.get_columns(UsageEvent._meta.table_name)
+]:
+    migrate(
+        SqliteMigrator(usage_db).add_column(
+            UsageEvent._meta.table_name, "source", UsageEvent.source
+        )
+    )
+usage_db.create_tables([UsageEvent, UsageDaily, UsageDailyUser, UsageRollupState])
+
+SECONDS_PER_DAY = 86400
+# Events read per rollup transaction
+USAGE_ROLLUP_BATCH_SIZE = 5000
+# Events updated per source backfill transaction
+USAGE_SOURCE_BACKFILL_BATCH_SIZE = 5000
+
+# Usage events waiting to be written by flush_usage_events
+pending_usage_events = deque()
+# Number of usage events dropped because the queue was full or the write failed
+dropped_usage_events = 0
+# Rows per insert, keeps each statement under SQLite's bound variable limit
+USAGE_INSERT_CHUNK_SIZE = 100
 
 
 def log_usage_event(
@@ -36,25 +111,169 @@ def log_usage_event(
     context: Optional[str] = None,
     details=None,
 ):
+    """
+    Queue a usage event to be written by the next flush_usage_events call.
+    """
+    global dropped_usage_events
+    if len(pending_usage_events) >= USAGE_LOG_QUEUE_SIZE:
+        dropped_usage_events += 1
+        return
     details_text = None
     if details is not None:
         if isinstance(details, str):
             details_text = details
         else:
             details_text = json.dumps(details)
-    UsageEvent.create(
-        ts=int(time.time()),
-        user_id=str(interaction.user.id),
-        username=interaction.user.name,
-        guild_id=str(interaction.guild_id) if interaction.guild_id else None,
-        channel_id=str(interaction.channel_id) if interaction.channel_id else None,
-        feature=feature,
-        action=action,
-        context=context,
-        details=details_text,
+    if isinstance(details, dict) and details.get("source"):
+        source = details["source"]
+    else:
+        source = _extract_source(context, details_text)
+    pending_usage_events.append(
+        {
+            "ts": int(time.time()),
+            "user_id": str(interaction.user.id),
+            "username": interaction.user.name,
+            "guild_id": str(interaction.guild_id) if interaction.guild_id else None,
+            "channel_id": (
+                str(interaction.channel_id) if interaction.channel_id else None
+            ),
+            "feature": feature,
+            "action": action,
+            "context": context,
+            "details": details_text,
+            "source": source,
+        }
     )
 
 
+def flush_usage_events() -> int:
+    """
+    Write every queued usage event in a single transaction. Safe to run in a worker
+    thread while events are still being queued.
+    """
+    global dropped_usage_events
+    rows = []
+    while pending_usage_events:
+        rows.append(pending_usage_events.popleft())
+    if rows:
+        try:
+            with usage_db.atomic():
+                for batch in chunked(rows, USAGE_INSERT_CHUNK_SIZE):
+                    UsageEvent.insert_many(batch).execute()
+        except Exception as e:
+            dropped_usage_events += len(rows)
+            print(f"Failed to write {len(rows)} usage events: {e}")
+            rows = []
+    try:
+        compact_usage_rollups()
+    except Exception as e:
+        print(f"Failed to roll up usage events: {e}")
+    return len(rows)
+
+
+def get_rollup_marker() -> int:
+    state = UsageRollupState.get_or_none(UsageRollupState.id == 1)
+    return state.last_event_id if state else 0
+
+
+def compact_usage_rollups() -> int:
+    """
+    Add the usage events written since the last call to the daily rollup tables, in
+    batches of USAGE_ROLLUP_BATCH_SIZE events. The first call after upgrading rolls up
+    every existing event.
+    """
+    compacted = 0
+    while True:
+        marker = get_rollup_marker()
+        rows = list(
+            UsageEvent.select(
+                UsageEvent.id,
+                UsageEvent.ts,
+                UsageEvent.user_id,
+                UsageEvent.username,
+                UsageEvent.guild_id,
+                UsageEvent.feature,
+                UsageEvent.action,
+                UsageEvent.context,
+                UsageEvent.source,
+            )
+            .where(UsageEvent.id > marker)
+            .order_by(UsageEvent.id)
+            .limit(USAGE_ROLLUP_BATCH_SIZE)
+        )
+        if not rows:
+            return compacted
+        daily_counts = Counter()
+        user_counts = Counter()
+        usernames = {}
+        for row in rows:
+            day = row.ts // SECONDS_PER_DAY
+            daily_counts[
+                (
+                    day,
+                    row.feature,
+                    row.action,
+                    row.context or "",
+                    row.source,
+                    row.guild_id or "",
+                )
+            ] += 1
+            user_counts[(day, row.user_id)] += 1
+            usernames[(day, row.user_id)] = row.username
+        with usage_db.atomic():
+            daily_rows = [
+                dict(
+                    zip(
+                        ("day", "feature", "action", "context", "source", "guild_id"),
+                        key,
+                    ),
+                    count=count,
+                )
+                for key, count in daily_counts.items()
+            ]
+            for batch in chunked(daily_rows, USAGE_INSERT_CHUNK_SIZE):
+                UsageDaily.insert_many(batch).on_conflict(
+                    conflict_target=(
+                        UsageDaily.day,
+                        UsageDaily.feature,
+                        UsageDaily.action,
+                        UsageDaily.context,
+                        UsageDaily.source,
+                        UsageDaily.guild_id,
+                    ),
+                    update={UsageDaily.count: UsageDaily.count + EXCLUDED.count},
+                ).execute()
+            user_rows = [
+                {
+                    "day": day,
+                    "user_id": user_id,
+                    "username": usernames[(day, user_id)],
+                    "count": count,
+                }
+                for (day, user_id), count in user_counts.items()
+            ]
+            for batch in chunked(user_rows, USAGE_INSERT_CHUNK_SIZE):
+                UsageDailyUser.insert_many(batch).on_conflict(
+                    conflict_target=(UsageDailyUser.day, UsageDailyUser.user_id),
+                    update={
+                        UsageDailyUser.count: UsageDailyUser.count + EXCLUDED.count,
+                        UsageDailyUser.username: EXCLUDED.username,
+                    },
+                ).execute()
+            UsageRollupState.insert(id=1, last_event_id=rows[-1].id).on_conflict(
+                conflict_target=(UsageRollupState.id,),
+                preserve=(UsageRollupState.last_event_id,),
+            ).execute()
+        compacted += len(rows)
+
+
+def get_usage_queue_stats():
+    return {
+        "pending": len(pending_usage_events),
+        "dropped": dropped_usage_events,
+    }
+
+
 def _extract_source(context: Optional[str], details_text: Optional[str]) -> str:
     if details_text:
         try:
@@ -70,23 +289,167 @@ def _extract_source(context: Optional[str], details_text: Optional[str]) -> str:
     return "unknown"
 
 
-def get_source_breakdown(start_ts: int, end_ts: int, user_id: Optional[str] = None):
-    query = UsageEvent.select(
-        UsageEvent.feature,
-        UsageEvent.context,
-        UsageEvent.details,
-    ).where(UsageEvent.ts.between(start_ts, end_ts))
+def _split_range(start_ts: int, end_ts: int, user_id: Optional[str] = None):
+    """
+    Split an inclusive time range into the UTC days that are wholly inside it, which are
+    read from the rollup tables, and a condition for the UsageEvent rows that have to be
+    read directly: the partial days at either end and the events that haven't been rolled
+    up yet. Ranges for a single user are always read directly since the rollups don't
+    have a user dimension.
+    """
     if user_id is not None:
-        query = query.where(UsageEvent.user_id == str(user_id))
+        return None, UsageEvent.ts.between(start_ts, end_ts) & (
+            UsageEvent.user_id == str(user_id)
+        )
+    first_day = -(-start_ts // SECONDS_PER_DAY)
+    stop_day = (end_ts + 1) // SECONDS_PER_DAY
+    if first_day >= stop_day:
+        return None, UsageEvent.ts.between(start_ts, end_ts)
+    days_start = first_day * SECONDS_PER_DAY
+    days_end = stop_day * SECONDS_PER_DAY - 1
+    raw_where = UsageEvent.ts.between(days_start, days_end) & (
+        UsageEvent.id > get_rollup_marker()
+    )
+    if start_ts < days_start:
+        raw_where |= UsageEvent.ts.between(start_ts, days_start - 1)
+    if days_end < end_ts:
+        raw_where |= UsageEvent.ts.between(days_end + 1, end_ts)
+    return (first_day, stop_day - 1), raw_where
+
+
+def _count_by(
+    dimensions: tuple[str, ...],
+    start_ts: int,
+    end_ts: int,
+    user_id: Optional[str] = None,
+) -> Counter:
+    """
+    Count the events in a time range grouped by the passed in UsageDaily columns. Missing
+    contexts and guild ids are counted under empty strings.
+    """
+    # read the rollup marker and both tables from one snapshot so that a compaction
+    # committing in between can't count its events twice or not at all
+    with usage_db.atomic():
+        days, raw_where = _split_range(start_ts, end_ts, user_id)
+        counts = Counter()
+        if days is not None:
+            query = (
+                UsageDaily.select(
+                    *[getattr(UsageDaily, name) for name in dimensions],
+                    fn.SUM(UsageDaily.count),
+                )
+                .where(UsageDaily.day.between(*days))
+                .group_by(*[getattr(UsageDaily, name) for name in dimensions])
+            )
+            for row in query.tuples():
+                counts[row[:-1]] += row[-1]
+        query = (
+            UsageEvent.select(
+                *[getattr(UsageEvent, name) for name in dimensions],
+                fn.COUNT(UsageEvent.id),
+            )
+            .where(raw_where)
+            .group_by(*[getattr(UsageEvent, name) for name in dimensions])
+        )
+        for row in query.tuples():
+            counts[tuple(value or "" for value in row[:-1])] += row[-1]
+        return counts
+
+
+def get_event_count(start_ts: int, end_ts: int, user_id: Optional[str] = None):
+    return sum(_count_by(("feature",), start_ts, end_ts, user_id).values())
+
+
+def get_feature_counts(start_ts: int, end_ts: int, user_id: Optional[str] = None):
+    counts = _count_by(("feature",), start_ts, end_ts, user_id)
+    return [(feature, count) for (feature,), count in counts.most_common()]
+
+
+def get_top_actions(
+    start_ts: int,
+    end_ts: int,
+    user_id: Optional[str] = None,
+    limit: int = 10,
+):
+    counts = _count_by(("feature", "action", "context"), start_ts, end_ts, user_id)
+    return [
+        (feature, action, context or None, count)
+        for (feature, action, context), count in counts.most_common(limit)
+    ]
+
+
+def get_unique_user_count(start_ts: int, end_ts: int, user_id: Optional[str] = None):
+    with usage_db.atomic():
+        days, raw_where = _split_range(start_ts, end_ts, user_id)
+        users = set()
+        if days is not None:
+            users.update(
+                row[0]
+                for row in UsageDailyUser.select(UsageDailyUser.user_id)
+                .where(UsageDailyUser.day.between(*days))
+                .distinct()
+                .tuples()
+            )
+        users.update(
+            row[0]
+            for row in UsageEvent.select(UsageEvent.user_id)
+            .where(raw_where)
+            .distinct()
+            .tuples()
+        )
+        return len(users)
+
+
+def get_top_users(start_ts: int, end_ts: int, limit: int = 10):
+    """
+    Return (username, user_id, count) for the users with the most events in the range,
+    using each user's most recent username.
+    """
+    with usage_db.atomic():
+        days, raw_where = _split_range(start_ts, end_ts)
+        counts = Counter()
+        usernames = {}
+        if days is not None:
+            query = (
+                UsageDailyUser.select(
+                    UsageDailyUser.user_id,
+                    UsageDailyUser.username,
+                    UsageDailyUser.count,
+                )
+                .where(UsageDailyUser.day.between(*days))
+                .order_by(UsageDailyUser.day)
+            )
+            for user_id, username, count in query.tuples():
+                counts[user_id] += count
+                usernames[user_id] = username
+        query = (
+            UsageEvent.select(
+                UsageEvent.user_id, UsageEvent.username, fn.COUNT(UsageEvent.id)
+            )
+            .where(raw_where)
+            .group_by(UsageEvent.user_id, UsageEvent.username)
+            .order_by(fn.MAX(UsageEvent.id))
+        )
+        for user_id, username, count in query.tuples():
+            counts[user_id] += count
+            usernames[user_id] = username
+        return [
+            (usernames[user_id], user_id, count)
+            for user_id, count in counts.most_common(limit)
+        ]
+
+
+def get_source_breakdown(start_ts: int, end_ts: int, user_id: Optional[str] = None):
     counts = {}
-    for row in query:
-        feature = row.feature or "unknown"
+    for (feature, source), count in _count_by(
+        ("feature", "source"), start_ts, end_ts, user_id
+    ).items():
+        feature = feature or "unknown"
         if feature not in counts:
             counts[feature] = {"guild": 0, "user_install": 0, "unknown": 0}
-        source = _extract_source(row.context, row.details)
         if source not in counts[feature]:
             counts[feature][source] = 0
-        counts[feature][source] += 1
+        counts[feature][source] += count
     return counts
 
 
@@ -103,18 +466,69 @@ def get_top_guilds(
     user_id: Optional[str] = None,
     limit: int = 5,
 ):
-    query = (
-        UsageEvent.select(
-            UsageEvent.guild_id, fn.COUNT(UsageEvent.id).alias("count")
-        )
-        .where(
-            UsageEvent.ts.between(start_ts, end_ts),
-            UsageEvent.guild_id.is_null(False),
+    counts = _count_by(("guild_id",), start_ts, end_ts, user_id)
+    # events outside of guilds are counted under an empty guild id
+    counts.pop(("",), None)
+    return [(guild_id, count) for (guild_id,), count in counts.most_common(limit)]
+
+
+def get_usage_summary(
+    start_ts: int,
+    end_ts: int,
+    user_id: Optional[str] = None,
+    top_guilds: int = 5,
+    top_users: int = 10,
+    top_actions: int = 10,
+):
+    """
+    Run all of the queries of a usage report in one read transaction so that its numbers
+    agree with each other. Top users are left out of reports for a single user.
+    """
+    with usage_db.atomic():
+        return {
+            "total": get_event_count(start_ts, end_ts, user_id),
+            "unique_users": get_unique_user_count(start_ts, end_ts, user_id),
+            "features": get_feature_counts(start_ts, end_ts, user_id),
+            "sources": get_source_breakdown(start_ts, end_ts, user_id),
+            "top_guilds": get_top_guilds(start_ts, end_ts, user_id, limit=top_guilds),
+            "top_users": (
+                get_top_users(start_ts, end_ts, limit=top_users)
+                if user_id is None
+                else []
+            ),
+            "top_actions": get_top_actions(
+                start_ts, end_ts, user_id, limit=top_actions
+            ),
+        }
+
+
+def backfill_usage_sources() -> int:
+    """
+    Fill in the source column of the events logged before it existed from their details,
+    in batches of USAGE_SOURCE_BACKFILL_BATCH_SIZE events.
+    """
+    backfilled = 0
+    while True:
+        rows = list(
+            UsageEvent.select(UsageEvent.id, UsageEvent.context, UsageEvent.details)
+            .where(UsageEvent.source.is_null())
+            .order_by(UsageEvent.id)
+            .limit(USAGE_SOURCE_BACKFILL_BATCH_SIZE)
         )
-        .group_by(UsageEvent.guild_id)
-        .order_by(fn.COUNT(UsageEvent.id).desc())
-        .limit(limit)
-    )
-    if user_id is not None:
-        query = query.where(UsageEvent.user_id == str(user_id))
-    return [(row.guild_id, row.count) for row in query]
+        if not rows:
+            return backfilled
+        ids_by_source = {}
+        for row in rows:
+            source = _extract_source(row.context, row.details)
+            ids_by_source.setdefault(source, []).append(row.id)
+        with usage_db.atomic():
+            for source, ids in ids_by_source.items():
+                for batch in chunked(ids, USAGE_INSERT_CHUNK_SIZE):
+                    UsageEvent.update(source=source).where(
+                        UsageEvent.id.in_(batch)
+                    ).execute()
+        backfilled += len(rows)
+
+
+# One time migration, the events have to have a source before they are rolled up
+backfill_usage_sources()
@@ -16,6 +16,14 @@ ENABLE_USAGE_REPORTS = True
 USAGE_REPORT_INTERVAL_HOURS = 24
 # Optional channel ID for scheduled reports (None sends to owner DMs)
 USAGE_REPORT_CHANNEL_ID = None
+# Maximum number of usage events waiting to be written, events past this are dropped
+USAGE_LOG_QUEUE_SIZE = 10000
+# Number of waiting usage events that triggers a write before the next scheduled one
+USAGE_LOG_BATCH_SIZE = 200
+# Interval in seconds between scheduled writes of waiting usage events
+USAGE_LOG_FLUSH_SECONDS = 5
+# Maximum number of rendered usage graphs kept in memory
+USAGE_GRAPH_CACHE_SIZE = 32
 
 # Setting this to true will allow any user or guild to use bot and user app features regardless of their whitelist status
 disableWhitelisting = True
@@ -26,6 +34,10 @@ cacheEndDay = 35
 selectStartDay = -3
 selectEndDay = 21
 numMoonCycles = 8
+# Interval in hours between background refreshes of the scroll and lunar caches
+CACHE_REFRESH_INTERVAL_HOURS = 6
+# Maximum number of rendered scroll and lunar responses kept in memory
+RESPONSE_CACHE_SIZE = 512
 numDisplayMoonCycles = 2
 numFilterDisplayMoonCycles = 5
 oneDay = 86400000
@@ -1,5 +1,11 @@
 from .commonImports import *
-from .helperFuncs import splitMsg, getPhaseList, checkWhiteListed, log_usage
+from .helperFuncs import (
+    splitMsg,
+    getPhaseList,
+    checkWhiteListed,
+    log_usage,
+    refreshEphemerisCaches,
+)
 
 
 # Create separate menu that will persist
@@ -124,7 +130,7 @@ class GuildLunarMenu(discord.ui.View):
         if phaseList[0] == "Range too Small":
             await interaction.response.defer(ephemeral=self.ephemeralRes, thinking=True)
             messageDeferred = True
-            ephemeris.updateMoonCache((time.time() * 1000), numMoonCycles)
+            await refreshEphemerisCaches()
             phaseList = getPhaseList(
                 ephemeris,
                 filters=[button.label],
@@ -267,7 +273,7 @@ class GuildPhaseSelMenu(discord.ui.Select):
         if phaseList[0] == "Range too Small":
             await interaction.response.defer(ephemeral=self.ephemeralRes, thinking=True)
             messageDeferred = True
-            ephemeris.updateMoonCache((time.time() * 1000), numMoonCycles)
+            await refreshEphemerisCaches()
             phaseList = getPhaseList(
                 ephemeris,
                 filters=self.values,
@@ -81,7 +81,7 @@ async def guildScrollMenu(
     )
     embed = discord.Embed(
         title="**Select what day you would like the scroll events for**",
-        description="*Glows should be accurate within a minute*",
+        description="*Glows should be accurate within a few seconds*",
         color=0xA21613,
     )
     embed.add_field(
@@ -122,10 +122,7 @@ class GuildScrollMenu(discord.ui.View):
         if dayList[0] == "Out of Range":
             await interaction.response.defer(ephemeral=self.ephemeralRes, thinking=True)
             messageDeferred = True
-            ephemeris.updateScrollCache(
-                start=(time.time() * 1000) + cacheStartDay * oneDay,
-                stop=(time.time() * 1000) + cacheEndDay * oneDay,
-            )
+            await refreshEphemerisCaches()
             dayList = getDayList(
                 ephemeris,
                 startDay=startDays[button.label],
@@ -243,10 +240,7 @@ class GuildDaySelMenu(discord.ui.Select):
         if dayList[0] == "Out of Range":
             await interaction.response.defer(ephemeral=self.ephemeralRes, thinking=True)
             messageDeferred = True
-            ephemeris.updateScrollCache(
-                start=(time.time() * 1000) + cacheStartDay * oneDay,
-                stop=(time.time() * 1000) + cacheEndDay * oneDay,
-            )
+            await refreshEphemerisCaches()
             dayList = dayList = getDayList(
                 ephemeris,
                 startDay=start,
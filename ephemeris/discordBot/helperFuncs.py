@@ -1,6 +1,16 @@
+import asyncio
+from functools import lru_cache
 from num2words import num2words
 from .commonImports import *
-from .configFiles.usageDataBase import log_usage_event
+from .configFiles.usageDataBase import (
+    log_usage_event,
+    flush_usage_events,
+    pending_usage_events,
+)
+from .responseCache import ResponseCache
+
+# rendered getDayList and getPhaseList responses, shared by the guild and user install menus
+renderedResponses = ResponseCache(RESPONSE_CACHE_SIZE)
 
 
 def is_owner(interaction: discord.Interaction) -> bool:
@@ -39,6 +49,63 @@ def log_usage(
         )
     except Exception:
         pass
+    if len(pending_usage_events) >= USAGE_LOG_BATCH_SIZE:
+        startUsageFlush()
+
+
+# the usage event write that is currently running
+usageFlushFuture: asyncio.Future | None = None
+
+
+def startUsageFlush() -> asyncio.Future:
+    """Writes the queued usage events in an executor so the inserts don't block the event loop.
+    Only one write runs at a time, the write that is already running is returned instead of
+    starting another.
+    """
+    global usageFlushFuture
+    if usageFlushFuture is None or usageFlushFuture.done():
+        usageFlushFuture = asyncio.get_running_loop().run_in_executor(
+            None, flush_usage_events
+        )
+    return usageFlushFuture
+
+
+async def flushUsageEvents() -> None:
+    """Waits for the queued usage events to be written."""
+    if usageFlushFuture is not None and not usageFlushFuture.done():
+        # the running write may have started before the latest events were queued
+        await usageFlushFuture
+    await startUsageFlush()
+
+
+# the cache refresh that is currently running, shared by every caller that needs it
+cacheRefreshTask: asyncio.Task | None = None
+
+
+async def refreshEphemerisCaches() -> None:
+    """Refreshes the scroll event and lunar caches in an executor so the event loop (and gateway
+    heartbeat) keeps running while they are calculated. Only one refresh runs at a time, callers
+    that request a refresh while one is in progress await that refresh instead of starting another.
+    """
+    global cacheRefreshTask
+    if cacheRefreshTask is None or cacheRefreshTask.done():
+        cacheRefreshTask = asyncio.create_task(_refreshEphemerisCaches())
+    # shielded so a cancelled interaction doesn't cancel the refresh for everyone else
+    await asyncio.shield(cacheRefreshTask)
+
+
+async def _refreshEphemerisCaches() -> None:
+    currentTime = time.time() * 1000
+    caches = await asyncio.get_running_loop().run_in_executor(
+        None,
+        ephemeris.refreshCaches,
+        currentTime + cacheStartDay * oneDay,
+        currentTime + cacheEndDay * oneDay,
+        currentTime,
+        numMoonCycles,
+    )
+    # swapped in on the event loop so interactions never see partially replaced caches
+    ephemeris.swapCaches(*caches)
 
 
 def getDayList(
@@ -75,46 +142,68 @@ def getDayList(
             A multi-line string describing the phase changes for a preset number of cycles from startTime.
     """
     currentTime = round((time.time() * 1000))
-    start = (
-        currentTime - round(0.25 * oneDay)
-        if startDay == 0
-        else currentTime + int(startDay) * int(oneDay)
-    )
-    if endDay == None:
-        end = currentTime + oneDay if startDay == 0 else start + oneDay
-    else:
-        end = currentTime + int(oneDay) * int(endDay) + oneDay
-    if end >= ephemeris.scrollEventsCache[-1][0]:
+    startOffset, endOffset = getDayOffsets(int(startDay), endDay)
+    # only a range past the end of the cache needs a refresh, a range after the last event
+    # can just have no events in it
+    if currentTime + endOffset >= ephemeris.scrollCacheStop:
         return ["Out of Range"]
-    cacheSubSet = ephemeris.getScrollEventsInRange(start, end)
-
+    eventRange = ephemeris.getDayRangeIndices(currentTime, startOffset, endOffset)
+    # the response only depends on which events are in range, not the exact time of the request
+    responseKey = (
+        "scroll",
+        eventRange,
+        frozenset(filters or ()),
+        getEmojiKey(useEmojis, emojis),
+    )
+    eventMsg = renderedResponses.get(ephemeris.cacheGeneration, responseKey)
+    if eventMsg is not None:
+        return eventMsg
     # filter out specific orb events
-    if filters != None and len(filters) != 0:
-        tempCache = []
-        for e in cacheSubSet:
-            for orb in filters:
-                if (
-                    orb in e["newGlows"]
-                    or orb in e["newDarks"]
-                    or orb in e["returnedToNormal"]
-                ):
-                    tempCache.append(e)
-                    break
-        cacheSubSet = tempCache
+    cacheSubSet = ephemeris.getScrollEventsInIndexRange(*eventRange, filters)
 
     if len(cacheSubSet) == 0:
         if filters != None and len(filters) != 0:
-            return "> **There are no events within the selected range that match the applied filters.**"
+            eventMsg = "> **There are no events within the selected range that match the applied filters.**"
         else:
-            return "> **There are no events within the selected range.**"
-    startState = cacheSubSet[0]
-    eventMsg = createScrollEventMsgLine(startState, useEmojis, True, emojis=emojis)
-    if len(cacheSubSet) > 1:
-        for event in cacheSubSet[1:]:
-            eventMsg += "\n" + createScrollEventMsgLine(event, useEmojis, emojis=emojis)
+            eventMsg = "> **There are no events within the selected range.**"
+    else:
+        startState = cacheSubSet[0]
+        eventMsg = createScrollEventMsgLine(startState, useEmojis, True, emojis=emojis)
+        if len(cacheSubSet) > 1:
+            for event in cacheSubSet[1:]:
+                eventMsg += "\n" + createScrollEventMsgLine(
+                    event, useEmojis, emojis=emojis
+                )
+    renderedResponses.put(ephemeris.cacheGeneration, responseKey, eventMsg)
     return eventMsg
 
 
+def getDayOffsets(startDay: int, endDay: int = None) -> tuple[int, int]:
+    """Converts a range of days into the offsets in ms from the current time that events in the range
+    can start at. Shared by every scroll menu so that each day covers the same time range.
+
+    Parameters
+    ---------
+        startDay: `int`
+            The number of days from the current time of the first day in the range.
+        endDay: `int` *optional*
+            The number of days from the current time of the last day in the range. Defaults to
+            None, which only includes the first day.
+
+    Returns
+    ---------
+        `tuple[int, int]`
+            The offsets in ms of the earliest and latest time an event in the range can start at.
+    """
+    # today also includes the last quarter of a day so recent events are still shown
+    startOffset = -round(0.25 * oneDay) if startDay == 0 else startDay * int(oneDay)
+    if endDay == None:
+        endOffset = oneDay if startDay == 0 else startOffset + oneDay
+    else:
+        endOffset = int(oneDay) * int(endDay) + oneDay
+    return startOffset, endOffset
+
+
 def getPhaseList(
     ephemeris: Ephemeris,
     startTime: int = None,
@@ -154,13 +243,13 @@ def getPhaseList(
         currentTime = round((time.time() * 1000))
         start = currentTime - ephemeris.oneAberothDay
 
-    startIndex = next(
-        (
-            i
-            for i, (timestamp, _) in enumerate(ephemeris.moonCyclesCache)
-            if timestamp > start
-        ),
-        None,
+    moonCyclesCache = ephemeris.moonCyclesCache
+    startIndex = moonCyclesCache.getStartIndex(start)
+    if startIndex == len(moonCyclesCache):
+        startIndex = None
+    # the current phase also depends on whether the next phase change has already happened
+    currentIndex = (
+        None if startTime != None else moonCyclesCache.getStartIndex(currentTime)
     )
 
     # filterLabelsToEventName = {
@@ -183,56 +272,66 @@ def getPhaseList(
                 phase = "full"
             eventFilters.append(phase)
 
+    responseKey = (
+        "lunar",
+        startIndex,
+        currentIndex,
+        tuple(eventFilters),
+        firstEventOnly,
+        getEmojiKey(useEmojis, emojis),
+    )
+    eventMsg = renderedResponses.get(ephemeris.cacheGeneration, responseKey)
+    if eventMsg is not None:
+        return eventMsg
+
     displayingCurrent = False
     subCache = []
     if startIndex != None:
         if eventFilters != None and len(eventFilters) != 0:
             if "all" in eventFilters:
-                subCache = ephemeris.moonCyclesCache[startIndex:]
-                if len(subCache) < numDisplayMoonCycles * 8 + 1:
+                if len(moonCyclesCache) - startIndex < numDisplayMoonCycles * 8 + 1:
                     return ["Range too Small"]
                 else:
-                    subCache = subCache[: numDisplayMoonCycles * 8 + 1]
+                    subCache = moonCyclesCache[
+                        startIndex : startIndex + numDisplayMoonCycles * 8 + 1
+                    ]
                     firstLine = f"__**Next {num2words(numDisplayMoonCycles).capitalize()} Aberoth Synodic Months:**__"
             elif "current" in eventFilters:
                 displayingCurrent = True
-                subCache = [copy.deepcopy(ephemeris.moonCyclesCache[startIndex])]
+                # getEvent builds a new dict so it can be modified without changing the cache
+                endTime, event = moonCyclesCache[startIndex]
                 # if the phase at the start index is the next phase
-                if subCache[0][0] > currentTime:
+                if endTime > currentTime:
                     # we already have the next time now we need to get the phase for current phase
-                    subCache[0][1]["phase"] = previousPhases[subCache[0][1]["phase"]]
+                    event["phase"] = previousPhases[event["phase"]]
                 # check if there is another event in the moonCycle cache to find end of current event
-                elif len(ephemeris.moonCyclesCache[startIndex:]) < 2:
+                elif len(moonCyclesCache) - startIndex < 2:
                     return ["Range too Small"]
                 # if current phase is a 1 night phase it can appear at the start index of moonCyclesCache
                 # in this case we have the current phase already but not the end time
                 else:
-                    subCache[0][1]["discordTS"] = ephemeris.moonCyclesCache[
-                        startIndex + 1
-                    ][1]["discordTS"]
+                    endTime = moonCyclesCache[startIndex + 1][0]
+                subCache = [(endTime, event)]
                 firstLine = "__**Current Phase:**__"
             elif firstEventOnly:
-                subCache = [
-                    next(
-                        (
-                            event
-                            for event in ephemeris.moonCyclesCache[startIndex:]
-                            if event[1]["phase"] in eventFilters
-                        ),
-                        None,
-                    )
-                ]
+                phaseIndices = moonCyclesCache.getPhaseEventIndices(
+                    eventFilters, startIndex
+                )
+                if len(phaseIndices) < 1:
+                    return ["Range too Small"]
+                subCache = [moonCyclesCache[phaseIndices[0]]]
                 firstLine = f"__**Next {(subCache[0][1]['phase']).capitalize()} Moon:**__\n*Note: phase may be the current phase.*"
             else:
-                subCache = [
-                    event
-                    for event in ephemeris.moonCyclesCache[startIndex:]
-                    if event[1]["phase"] in eventFilters
-                ]
-                if len(subCache) < numFilterDisplayMoonCycles * len(eventFilters):
+                phaseIndices = moonCyclesCache.getPhaseEventIndices(
+                    eventFilters, startIndex
+                )
+                if len(phaseIndices) < numFilterDisplayMoonCycles * len(eventFilters):
                     return ["Range too Small"]
                 else:
-                    subCache = subCache[: numFilterDisplayMoonCycles * 8 + 1]
+                    subCache = [
+                        moonCyclesCache[i]
+                        for i in phaseIndices[: numFilterDisplayMoonCycles * 8 + 1]
+                    ]
                     firstLine = f"__**Filtered Phases:**__\nNext {join_with_oxford_comma(eventFilters)} moons over the next {num2words(numFilterDisplayMoonCycles)} Aberoth synodic months"
     if len(subCache) < 1:
         return ["Range too Small"]
@@ -242,9 +341,31 @@ def getPhaseList(
         eventMsg += "\n" + createLunarEventMsgLine(
             event, useEmojis, emojis=emojis, displayingCurrent=displayingCurrent
         )
+    renderedResponses.put(ephemeris.cacheGeneration, responseKey, eventMsg)
     return eventMsg
 
 
+def getEmojiKey(useEmojis: bool, emojis: dict[str, str] = None) -> tuple | None:
+    """Converts the emojis a response is rendered with into a hashable key.
+
+    Parameters
+    ---------
+        useEmojis: `bool`
+            Whether the response uses emojis.
+        emojis: `dict[str,str]` *optional*
+            A `dict` with orb or phase names for keys and string containing a discord emoji for its values.
+            Defaults to None.
+
+    Returns
+    ---------
+        `tuple | None`
+            The emojis as a sorted `tuple` of pairs, or None if the default emojis or names are used.
+    """
+    if not useEmojis or emojis == None:
+        return None
+    return tuple(sorted(emojis.items()))
+
+
 def createLunarEventMsgLine(
     event: tuple[int, dict[str, str]],
     useEmojis: bool = True,
@@ -270,16 +391,17 @@ def createLunarEventMsgLine(
         `str`
             A one line string that describes the phase at the time for the passed in event.
     """
+    discordTS = formatDiscordTimestamp(event[0], "t")
     if useEmojis and emojis != None:
         if displayingCurrent:
-            return f"> {emojis[event[1]['phase']]} the moon is {moonDisplayNames[event[1]['phase']]} until {event[1]['discordTS']}."
+            return f"> {emojis[event[1]['phase']]} the moon is {moonDisplayNames[event[1]['phase']]} until {discordTS}."
         else:
-            return f"> {emojis[event[1]['phase']]} {event[1]['discordTS']} the moon is {moonDisplayNames[event[1]['phase']]}."
+            return f"> {emojis[event[1]['phase']]} {discordTS} the moon is {moonDisplayNames[event[1]['phase']]}."
     else:
         if displayingCurrent:
-            return f"> {UsersInstallDefaultEmojis[event[1]['phase']]} the moon is {moonDisplayNames[event[1]['phase']]} until {event[1]['discordTS']}."
+            return f"> {UsersInstallDefaultEmojis[event[1]['phase']]} the moon is {moonDisplayNames[event[1]['phase']]} until {discordTS}."
         else:
-            return f"> {UsersInstallDefaultEmojis[event[1]['phase']]} {event[1]['discordTS']} {moonDisplayNames[event[1]['phase']]}."
+            return f"> {UsersInstallDefaultEmojis[event[1]['phase']]} {discordTS} {moonDisplayNames[event[1]['phase']]}."
 
 
 def createScrollEventMsgLine(
@@ -305,10 +427,11 @@ def createScrollEventMsgLine(
         `str`
             A one line string that describes the scroll event changes for the passed in events
     """
+    timestamp, event = event
     glows = event["newGlows"]
     darks = [i for i in event["newDarks"] if i != "Shadow"]
     normals = [i for i in event["returnedToNormal"] if i != "Shadow"]
-    msg = f"> {event['discordTS']}"
+    msg = f"> {formatDiscordTimestamp(timestamp)}"
     for index, cat in enumerate([glows, darks, normals]):
         tempMsg = ""
         if len(cat) < 1:
@@ -349,6 +472,27 @@ def createScrollEventMsgLine(
     return msg
 
 
+@lru_cache(maxsize=4096)
+def formatDiscordTimestamp(timestamp: int, timeStyle: str = "T") -> str:
+    """Formats an epoch timestamp as a discord date and time. Memoized since the same events are
+    rendered over and over.
+
+    Parameters
+    ---------
+        timestamp: `int`
+            The epoch time in ms.
+        timeStyle: `str` *optional*
+            The discord timestamp style used for the time, "T" for long time and "t" for
+            short time. Defaults to "T".
+
+    Returns
+    ---------
+        `str`
+            A string that discord renders as the date and time in the reader's timezone.
+    """
+    return f"<t:{timestamp // 1000}:D> <t:{timestamp // 1000}:{timeStyle}>"
+
+
 def splitMsg(msg: str, maxLen: int = 2000) -> list[str]:
     """Splits a message into a `list` of strings. Splits on the previous new line
     character when the length of current string exceeds the value of maxLen.
@@ -1,12 +1,7 @@
-from peewee import fn
 from .bot import *
 from .helperFuncs import *
-from .usageGraphs import build_usage_graph
-from .configFiles.usageDataBase import (
-    UsageEvent,
-    get_source_breakdown,
-    get_top_guilds,
-)
+from .usageGraphs import render_usage_graph, rendered_graphs
+from .configFiles.usageDataBase import get_usage_queue_stats, get_usage_summary
 
 
 @bot.tree.command(name="hello")
@@ -62,6 +57,8 @@ async def updateWhiteList(
                 ephemeral=True,
             )
             return
+        # edit the saved settings rather than ones cached before a change made elsewhere
+        user_settings_cache.invalidate(str(user_or_guild))
         userSettings = fetch_user_settings(user_or_guild)
         try:
             # if the user is not in the SQL DB
@@ -100,6 +97,8 @@ async def updateWhiteList(
                 ephemeral=True,
             )
             return
+        # edit the saved settings rather than ones cached before a change made elsewhere
+        guild_settings_cache.invalidate(str(user_or_guild))
         guildSettings = fetch_guild_settings(user_or_guild)
         # if the guild is not in the SQL DB
         if not guildSettings:
@@ -382,7 +381,15 @@ async def setPersonalEmojis(
     last_days_start="Start of range in days ago (0 = today)",
     last_days_end="End of range in days ago (>= start)",
     user="Optional user for a specific breakdown",
-    graph="Include a daily usage graph",
+    graph="Include a usage graph",
+    graph_bucket="Time covered by each point on the graph (default daily)",
+)
+@app_commands.choices(
+    graph_bucket=[
+        discord.app_commands.Choice(name="Hourly", value="hour"),
+        discord.app_commands.Choice(name="Daily", value="day"),
+        discord.app_commands.Choice(name="Weekly", value="week"),
+    ],
 )
 async def usageStats(
     interaction: discord.Interaction,
@@ -390,8 +397,11 @@ async def usageStats(
     last_days_end: Optional[int] = 7,
     user: Optional[discord.User] = None,
     graph: Optional[bool] = False,
+    graph_bucket: Optional[discord.app_commands.Choice[str]] = None,
 ) -> None:
     await interaction.response.defer(ephemeral=True, thinking=True)
+    # include the events that are still queued
+    await flushUsageEvents()
 
     if last_days_start is None:
         last_days_start = 0
@@ -410,45 +420,32 @@ async def usageStats(
     start_ts = now - int(last_days_end) * 86400
     end_ts = now - int(last_days_start) * 86400
 
-    filters = [UsageEvent.ts.between(start_ts, end_ts)]
-    if user is not None:
-        filters.append(UsageEvent.user_id == str(user.id))
+    user_id = str(user.id) if user is not None else None
 
-    total_count = UsageEvent.select().where(*filters).count()
+    summary = await asyncio.get_running_loop().run_in_executor(
+        None, get_usage_summary, start_ts, end_ts, user_id
+    )
+    total_count = summary["total"]
     if total_count == 0:
         await interaction.followup.send(
             content="No usage records found for that time range.",
             ephemeral=True,
         )
         return
-    unique_users = (
-        UsageEvent.select(UsageEvent.user_id).where(*filters).distinct().count()
-    )
-
     feature_counts = {"scroll": 0, "lunar": 0}
     extra_features = []
-    feature_query = (
-        UsageEvent.select(
-            UsageEvent.feature, fn.COUNT(UsageEvent.id).alias("count")
-        )
-        .where(*filters)
-        .group_by(UsageEvent.feature)
-        .order_by(fn.COUNT(UsageEvent.id).desc())
-    )
-    for row in feature_query:
-        if row.feature in feature_counts:
-            feature_counts[row.feature] = row.count
+    for feature, count in summary["features"]:
+        if feature in feature_counts:
+            feature_counts[feature] = count
         else:
-            extra_features.append(f"{row.feature}: {row.count}")
+            extra_features.append(f"{feature}: {count}")
     feature_summary = (
         f"scroll: {feature_counts['scroll']}, lunar: {feature_counts['lunar']}"
     )
     if extra_features:
         feature_summary = f"{feature_summary}, " + ", ".join(extra_features)
 
-    source_counts = get_source_breakdown(
-        start_ts, end_ts, user_id=str(user.id) if user is not None else None
-    )
+    source_counts = summary["sources"]
     scroll_sources = source_counts.get(
         "scroll", {"guild": 0, "user_install": 0, "unknown": 0}
     )
@@ -468,19 +465,6 @@ async def usageStats(
         lunar_source_summary += f", unknown {lunar_sources['unknown']}"
     lunar_source_summary += ")"
 
-    action_query = (
-        UsageEvent.select(
-            UsageEvent.feature,
-            UsageEvent.action,
-            UsageEvent.context,
-            fn.COUNT(UsageEvent.id).alias("count"),
-        )
-        .where(*filters)
-        .group_by(UsageEvent.feature, UsageEvent.action, UsageEvent.context)
-        .order_by(fn.COUNT(UsageEvent.id).desc())
-        .limit(10)
-    )
-
     lines = [
         "**Usage stats**",
         f"**Range:** {last_days_end}-{last_days_start} days ago (<t:{start_ts}:d> - <t:{end_ts}:d>)",
@@ -488,14 +472,12 @@ async def usageStats(
     if user is not None:
         lines.append(f"**User:** {user.mention} ({user.id})")
     lines.append(f"**Total events:** {total_count}")
-    lines.append(f"**Unique users:** {unique_users}")
+    lines.append(f"**Unique users:** {summary['unique_users']}")
     lines.append(f"**By feature:** {feature_summary}")
     lines.append(
         f"**By install:** {scroll_source_summary}, {lunar_source_summary}"
     )
-    top_guilds = get_top_guilds(
-        start_ts, end_ts, user_id=str(user.id) if user is not None else None, limit=5
-    )
+    top_guilds = summary["top_guilds"]
     if top_guilds:
         lines.append("**Top guilds:**")
         for guild_id, count in top_guilds:
@@ -509,36 +491,39 @@ async def usageStats(
         lines.append("**Top guilds:** none")
 
     if user is None:
-        top_users = (
-            UsageEvent.select(
-                UsageEvent.user_id,
-                UsageEvent.username,
-                fn.COUNT(UsageEvent.id).alias("count"),
-            )
-            .where(UsageEvent.ts.between(start_ts, end_ts))
-            .group_by(UsageEvent.user_id, UsageEvent.username)
-            .order_by(fn.COUNT(UsageEvent.id).desc())
-            .limit(10)
-        )
         lines.append("**Top users:**")
-        for row in top_users:
-            lines.append(f"- {row.username} ({row.user_id}): {row.count}")
+        for username, top_user_id, count in summary["top_users"]:
+            lines.append(f"- {username} ({top_user_id}): {count}")
 
     lines.append("**Top actions:**")
-    for row in action_query:
-        label = f"{row.feature}/{row.action}"
-        if row.context:
-            label = f"{label} ({row.context})"
-        lines.append(f"- {label}: {row.count}")
+    for feature, action, context, count in summary["top_actions"]:
+        label = f"{feature}/{action}"
+        if context:
+            label = f"{label} ({context})"
+        lines.append(f"- {label}: {count}")
+
+    queue_stats = get_usage_queue_stats()
+    lines.append(
+        f"**Usage logging:** {queue_stats['pending']} pending, {queue_stats['dropped']} dropped"
+    )
+    response_stats = renderedResponses.getStats()
+    lines.append(
+        f"**Response cache:** {response_stats['hits']} hits, {response_stats['misses']} misses, {response_stats['size']} cached"
+    )
+    graph_stats = rendered_graphs.getStats()
+    lines.append(
+        f"**Graph cache:** {graph_stats['hits']} hits, {graph_stats['misses']} misses, {graph_stats['size']} cached"
+    )
 
     message = "\n".join(lines)
     graph_file = None
     if graph:
-        buf, error = build_usage_graph(
+        buf, error = await render_usage_graph(
             start_ts=start_ts,
             end_ts=end_ts,
-            user_id=str(user.id) if user is not None else None,
+            user_id=user_id,
             user_name=user.name if user is not None else None,
+            bucket=graph_bucket.value if graph_bucket is not None else "day",
         )
         if error:
             await interaction.followup.send(
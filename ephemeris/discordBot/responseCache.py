@@ -0,0 +1,67 @@
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """A least recently used cache of rendered responses. Every entry belongs to the
+    generation of the data it was rendered from, such as the ephemeris cache generation,
+    the entries are dropped as soon as a response from a newer generation is requested.
+    """
+
+    def __init__(self, maxSize: int = 512) -> None:
+        self.maxSize = maxSize
+        self.generation = None
+        self.responses = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.responses)
+
+    def get(self, generation: int, key: tuple) -> str | bytes | None:
+        """Looks up a rendered response and marks it as the most recently used.
+
+        Parameters
+        ---------
+            generation: `int`
+                The current generation of the data the response is rendered from.
+            key: `tuple`
+                Everything besides the generation that the rendered response depends on.
+
+        Returns
+        ---------
+            `str | bytes | None`
+                The rendered response, or None if it isn't cached.
+        """
+        if generation != self.generation:
+            self.responses.clear()
+            self.generation = generation
+        response = self.responses.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.responses.move_to_end(key)
+        return response
+
+    def put(self, generation: int, key: tuple, response: str | bytes) -> None:
+        """Stores a rendered response, evicting the least recently used response when full.
+
+        Parameters
+        ---------
+            generation: `int`
+                The generation of the data the response was rendered from.
+            key: `tuple`
+                Everything besides the generation that the rendered response depends on.
+            response: `str | bytes`
+                The rendered response.
+        """
+        if generation != self.generation:
+            return
+        self.responses[key] = response
+        self.responses.move_to_end(key)
+        if len(self.responses) > self.maxSize:
+            self.responses.popitem(last=False)
+
+    def getStats(self) -> dict[str, int]:
+        """Returns the hit and miss counts and the number of cached responses."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
@@ -1,160 +1,138 @@
+import asyncio
 import io
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from typing import Optional, Tuple
 
+from peewee import Case, fn
+
+from ..usageGraphRenderer import build_usage_graph, init_graph_worker
 from .configFiles.usageDataBase import UsageEvent
+from .configFiles.variables import USAGE_GRAPH_CACHE_SIZE
+from .responseCache import ResponseCache
+
+# Seconds covered by each point on a usage graph
+GRAPH_BUCKET_SECONDS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+# Graph ranges are extended to end on a whole hour so requests made in the same hour share
+# a cached graph
+GRAPH_CACHE_RESOLUTION = 3600
+# Seconds a rendered graph is reused for before the events written since are graphed
+GRAPH_CACHE_SECONDS = 300
+
+# Rendered PNGs, dropped every GRAPH_CACHE_SECONDS
+rendered_graphs = ResponseCache(USAGE_GRAPH_CACHE_SIZE)
+graph_executor: Optional[Executor] = None
 
 
-def _build_daily_series(
-    start_ts: int, end_ts: int, user_id: Optional[str]
+def _build_usage_series(
+    start_ts: int, end_ts: int, user_id: Optional[str], bucket_seconds: int = 86400
 ) -> Tuple[list[datetime], list[int], list[int], list[int], list[int]]:
-    num_days = int((end_ts - start_ts) // 86400)
-    if num_days <= 0:
+    num_buckets = int((end_ts - start_ts) // bucket_seconds)
+    if num_buckets <= 0:
         return [], [], [], [], []
-    totals = [0] * num_days
-    scroll_counts = [0] * num_days
-    lunar_counts = [0] * num_days
-    user_sets = [set() for _ in range(num_days)]
-
-    query = UsageEvent.select(
-        UsageEvent.ts, UsageEvent.feature, UsageEvent.user_id
-    ).where(UsageEvent.ts.between(start_ts, end_ts))
+    totals = [0] * num_buckets
+    scroll_counts = [0] * num_buckets
+    lunar_counts = [0] * num_buckets
+    unique_counts = [0] * num_buckets
+
+    # buckets start at start_ts, the leftover partial bucket is merged into the last one
+    bucket = fn.MIN((UsageEvent.ts - start_ts) / bucket_seconds, num_buckets - 1)
+    query = (
+        UsageEvent.select(
+            bucket,
+            fn.COUNT(UsageEvent.id),
+            fn.SUM(Case(None, [(UsageEvent.feature == "scroll", 1)], 0)),
+            fn.SUM(Case(None, [(UsageEvent.feature == "lunar", 1)], 0)),
+            fn.COUNT(UsageEvent.user_id.distinct()),
+        )
+        .where(UsageEvent.ts.between(start_ts, end_ts))
+        .group_by(bucket)
+    )
     if user_id is not None:
         query = query.where(UsageEvent.user_id == str(user_id))
 
-    for row in query:
-        idx = int((row.ts - start_ts) // 86400)
-        if idx == num_days:
-            idx = num_days - 1
-        if idx < 0 or idx >= num_days:
-            continue
-        totals[idx] += 1
-        if row.feature == "scroll":
-            scroll_counts[idx] += 1
-        elif row.feature == "lunar":
-            lunar_counts[idx] += 1
-        user_sets[idx].add(row.user_id)
+    for idx, total, scroll, lunar, unique in query.tuples():
+        totals[idx] = total
+        scroll_counts[idx] = scroll
+        lunar_counts[idx] = lunar
+        unique_counts[idx] = unique
 
     labels = []
-    for i in range(num_days):
-        day_start = start_ts + (i * 86400)
-        labels.append(datetime.utcfromtimestamp(day_start))
-    unique_counts = [len(s) for s in user_sets]
+    for i in range(num_buckets):
+        bucket_start = start_ts + (i * bucket_seconds)
+        labels.append(datetime.utcfromtimestamp(bucket_start))
     return labels, totals, scroll_counts, lunar_counts, unique_counts
 
 
-def build_usage_graph(
+def _get_graph_executor() -> Executor:
+    """Gets the graph worker, starting it if it isn't running. Where available the worker is
+    forked from a server process that has already imported matplotlib, the server is shared
+    with the ephemeris worker pool so matplotlib is imported by the worker instead when that
+    pool started it first.
+    """
+    global graph_executor
+    if graph_executor is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(
+                ["matplotlib.pyplot", build_usage_graph.__module__]
+            )
+        else:
+            context = multiprocessing.get_context("spawn")
+        graph_executor = ProcessPoolExecutor(
+            max_workers=1, mp_context=context, initializer=init_graph_worker
+        )
+    return graph_executor
+
+
+def shutdown_graph_worker() -> None:
+    global graph_executor
+    if graph_executor is not None:
+        graph_executor.shutdown(wait=False, cancel_futures=True)
+        graph_executor = None
+
+
+async def render_usage_graph(
     start_ts: int,
     end_ts: int,
     user_id: Optional[str] = None,
     user_name: Optional[str] = None,
-):
-    try:
-        import matplotlib
-
-        matplotlib.use("Agg")
-        import matplotlib.pyplot as plt
-        import matplotlib.dates as mdates
-        from matplotlib import patheffects
-    except Exception as exc:
-        return None, "Graphing requires matplotlib to be installed."
-
-    labels, totals, scroll_counts, lunar_counts, unique_counts = _build_daily_series(
-        start_ts, end_ts, user_id
-    )
-    if not labels:
-        return None, "Graphing requires a range of at least 1 day."
-
-    if sum(totals) == 0:
-        show_data = False
-    else:
-        show_data = True
-
-    fig, ax = plt.subplots(figsize=(9, 4))
-    fig.patch.set_facecolor("#40444B")
-    ax.set_facecolor("#40444B")
-
-    axes_xcolor = "#E9E9E9"
-    spine_color = "#1B1C1F"
-    grid_color = "#2C2E33"
-
-    ax.plot(labels, totals, color="#FAC32D", marker="o", label="Total", linewidth=2)
-    ax.plot(
-        labels,
-        scroll_counts,
-        color="#00A745",
-        marker="o",
-        label="Scroll",
-        linewidth=2,
-    )
-    ax.plot(
-        labels,
-        lunar_counts,
-        color="#5B6CFF",
-        marker="o",
-        label="Lunar",
-        linewidth=2,
+    bucket: str = "day",
+) -> Tuple[Optional[io.BytesIO], Optional[str]]:
+    """
+    Render a usage graph in the graph worker without blocking the event loop. The range is
+    extended to end on a whole hour, graphs of the same range are served from
+    rendered_graphs for up to GRAPH_CACHE_SECONDS.
+    """
+    loop = asyncio.get_running_loop()
+    graph_end = -(-end_ts // GRAPH_CACHE_RESOLUTION) * GRAPH_CACHE_RESOLUTION
+    graph_start = graph_end - (end_ts - start_ts)
+    generation = int(time.time()) // GRAPH_CACHE_SECONDS
+    key = (graph_start, graph_end, bucket, user_id, user_name)
+    png = rendered_graphs.get(generation, key)
+    if png is not None:
+        return io.BytesIO(png), None
+
+    series = await loop.run_in_executor(
+        None,
+        _build_usage_series,
+        graph_start,
+        graph_end,
+        user_id,
+        GRAPH_BUCKET_SECONDS[bucket],
     )
-    if user_id is None:
-        ax.plot(
-            labels,
-            unique_counts,
-            color="#C22323",
-            marker="o",
-            label="Unique users",
-            linewidth=2,
-            linestyle="--",
-        )
-
-    title = "Usage over time"
-    if user_name:
-        title = f"Usage over time - {user_name}"
-    title_obj = ax.set_title(title, color=axes_xcolor, fontsize=14)
-    title_obj.set_path_effects(
-        [patheffects.withStroke(linewidth=3, foreground=spine_color)]
-    )
-
-    ax.set_xlabel("Date (UTC)", color=axes_xcolor)
-    ax.set_ylabel("Events", color=axes_xcolor)
-    ax.grid(color=grid_color)
-    ax.tick_params(axis="x", colors=axes_xcolor)
-    ax.tick_params(axis="y", colors=axes_xcolor)
-
-    for spine in ax.spines.values():
-        spine.set_color(spine_color)
-        spine.set_linewidth(2)
-
-    ax.xaxis.set_major_locator(mdates.DayLocator(interval=1))
-    ax.xaxis.set_major_formatter(mdates.DateFormatter("%b %d"))
-    for tick in ax.get_xticklabels():
-        tick.set_rotation(45)
-        tick.set_ha("right")
-
-    legend = ax.legend()
-    if legend is not None:
-        legend.get_frame().set_facecolor("#40444B")
-        legend.get_frame().set_edgecolor(spine_color)
-        for text in legend.get_texts():
-            text.set_color(axes_xcolor)
-
-    if not show_data:
-        props = dict(boxstyle="round", facecolor="ivory", alpha=0.7)
-        ax.text(
-            0.5,
-            0.5,
-            "Not Enough Data!",
-            transform=ax.transAxes,
-            fontsize=18,
-            va="center",
-            ha="center",
-            bbox=props,
+    try:
+        png, error = await loop.run_in_executor(
+            _get_graph_executor(), build_usage_graph, series, user_id, user_name, bucket
         )
-        ax.set_yticks([])
-        ax.set_xticks([])
-
-    fig.tight_layout()
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png")
-    plt.close(fig)
-    buf.seek(0)
-    return buf, None
+    except BrokenProcessPool:
+        # the worker died, a new one is started for the next graph
+        shutdown_graph_worker()
+        return None, "The graph worker stopped unexpectedly."
+    if error:
+        return None, error
+    rendered_graphs.put(generation, key, png)
+    return io.BytesIO(png), None
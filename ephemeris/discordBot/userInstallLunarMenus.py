@@ -1,5 +1,5 @@
 from .commonImports import *
-from .helperFuncs import splitMsg, getPhaseList, log_usage
+from .helperFuncs import splitMsg, getPhaseList, log_usage, refreshEphemerisCaches
 
 
 # The user install lunar menu, stores menu settings and spawns buttons
@@ -120,7 +120,7 @@ class UserInstallLunarMenu(discord.ui.View):
         if phaseList[0] == "Range too Small":
             await interaction.response.defer(ephemeral=self.ephemeralRes, thinking=True)
             messageDeferred = True
-            ephemeris.updateMoonCache((time.time() * 1000), numMoonCycles)
+            await refreshEphemerisCaches()
             phaseList = getPhaseList(
                 ephemeris,
                 filters=[button.label],
@@ -253,7 +253,7 @@ class UserInstallPhaseSelMenu(discord.ui.Select):
         if phaseList[0] == "Range too Small":
             await interaction.response.defer(ephemeral=self.ephemeralRes, thinking=True)
             messageDeferred = True
-            ephemeris.updateMoonCache((time.time() * 1000), numMoonCycles)
+            await refreshEphemerisCaches()
             phaseList = getPhaseList(
                 ephemeris,
                 filters=self.values,
@@ -109,10 +109,7 @@ class UserInstallScrollMenu(discord.ui.View):
         if dayList[0] == "Out of Range":
             await interaction.response.defer(ephemeral=False, thinking=True)
             messageDeferred = True
-            ephemeris.updateScrollCache(
-                start=(time.time() * 1000) + cacheStartDay * oneDay,
-                stop=(time.time() * 1000) + cacheEndDay * oneDay,
-            )
+            await refreshEphemerisCaches()
             dayList = getDayList(
                 ephemeris,
                 startDay=startDays[button.label],
@@ -180,8 +177,8 @@ class UserInstallSelDayMenu(discord.ui.Select):
                 ephemeral=True,
             )
             return
-        start = min(self.values)
-        end = max(self.values)
+        start = min(map(int, self.values))
+        end = max(map(int, self.values))
         log_usage(
             interaction=interaction,
             feature="scroll",
@@ -204,10 +201,7 @@ class UserInstallSelDayMenu(discord.ui.Select):
         if dayList[0] == "Out of Range":
             await interaction.response.defer(ephemeral=False, thinking=True)
             messageDeferred = True
-            ephemeris.updateScrollCache(
-                start=(time.time() * 1000) + cacheStartDay * oneDay,
-                stop=(time.time() * 1000) + cacheEndDay * oneDay,
-            )
+            await refreshEphemerisCaches()
             dayList = getDayList(
                 ephemeris,
                 startDay=start,
@@ -0,0 +1,142 @@
+import io
+from datetime import datetime
+from typing import Optional, Tuple
+
+# Renders the usage graphs in the graph worker process. Nothing from the discord bot is
+# imported here so the worker doesn't have to import the bot to run build_usage_graph.
+
+# Set by init_graph_worker in the process that renders the graphs
+plt = None
+mdates = None
+patheffects = None
+
+
+def init_graph_worker() -> None:
+    """Imports matplotlib once for every graph the worker renders."""
+    global plt, mdates, patheffects
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
+        from matplotlib import patheffects
+    except Exception:
+        plt = None
+
+
+def build_usage_graph(
+    series: Tuple[list[datetime], list[int], list[int], list[int], list[int]],
+    user_id: Optional[str] = None,
+    user_name: Optional[str] = None,
+    bucket: str = "day",
+) -> Tuple[Optional[bytes], Optional[str]]:
+    """Renders a usage series to PNG bytes, runs in the graph worker."""
+    if plt is None:
+        init_graph_worker()
+        if plt is None:
+            return None, "Graphing requires matplotlib to be installed."
+
+    labels, totals, scroll_counts, lunar_counts, unique_counts = series
+    if not labels:
+        return None, f"Graphing requires a range of at least 1 {bucket}."
+
+    if sum(totals) == 0:
+        show_data = False
+    else:
+        show_data = True
+
+    fig, ax = plt.subplots(figsize=(9, 4))
+    fig.patch.set_facecolor("#40444B")
+    ax.set_facecolor("#40444B")
+
+    axes_xcolor = "#E9E9E9"
+    spine_color = "#1B1C1F"
+    grid_color = "#2C2E33"
+
+    ax.plot(labels, totals, color="#FAC32D", marker="o", label="Total", linewidth=2)
+    ax.plot(
+        labels,
+        scroll_counts,
+        color="#00A745",
+        marker="o",
+        label="Scroll",
+        linewidth=2,
+    )
+    ax.plot(
+        labels,
+        lunar_counts,
+        color="#5B6CFF",
+        marker="o",
+        label="Lunar",
+        linewidth=2,
+    )
+    if user_id is None:
+        ax.plot(
+            labels,
+            unique_counts,
+            color="#C22323",
+            marker="o",
+            label="Unique users",
+            linewidth=2,
+            linestyle="--",
+        )
+
+    title = "Usage over time"
+    if user_name:
+        title = f"Usage over time - {user_name}"
+    title_obj = ax.set_title(title, color=axes_xcolor, fontsize=14)
+    title_obj.set_path_effects(
+        [patheffects.withStroke(linewidth=3, foreground=spine_color)]
+    )
+
+    ax.set_xlabel("Date (UTC)", color=axes_xcolor)
+    ax.set_ylabel("Events", color=axes_xcolor)
+    ax.grid(color=grid_color)
+    ax.tick_params(axis="x", colors=axes_xcolor)
+    ax.tick_params(axis="y", colors=axes_xcolor)
+
+    for spine in ax.spines.values():
+        spine.set_color(spine_color)
+        spine.set_linewidth(2)
+
+    if bucket == "day" and len(labels) <= 14:
+        ax.xaxis.set_major_locator(mdates.DayLocator(interval=1))
+    else:
+        # a tick per point is unreadable for long ranges
+        ax.xaxis.set_major_locator(mdates.AutoDateLocator(maxticks=14))
+    if bucket == "hour":
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%b %d %H:%M"))
+    else:
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%b %d"))
+    for tick in ax.get_xticklabels():
+        tick.set_rotation(45)
+        tick.set_ha("right")
+
+    legend = ax.legend()
+    if legend is not None:
+        legend.get_frame().set_facecolor("#40444B")
+        legend.get_frame().set_edgecolor(spine_color)
+        for text in legend.get_texts():
+            text.set_color(axes_xcolor)
+
+    if not show_data:
+        props = dict(boxstyle="round", facecolor="ivory", alpha=0.7)
+        ax.text(
+            0.5,
+            0.5,
+            "Not Enough Data!",
+            transform=ax.transAxes,
+            fontsize=18,
+            va="center",
+            ha="center",
+            bbox=props,
+        )
+        ax.set_yticks([])
+        ax.set_xticks([])
+
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    plt.close(fig)
+    return buf.getvalue(), None